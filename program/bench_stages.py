@@ -0,0 +1,470 @@
+from decouple import config
+from collections import Counter
+from datetime import datetime
+import subprocess
+import threading
+import tracemalloc
+import itertools
+import argparse
+import tempfile
+import calendar
+import json
+import time
+import sys
+import os
+
+# Settings the stages need, only used when missing from the environment and .env
+BENCH_SETTINGS = {
+    "MODE": "DEVELOPMENT",
+    "ABORT_ALL_POSITIONS": "False",
+    "FIND_COINTEGRATED": "True",
+    "MANAGE_EXITS": "True",
+    "PLACE_TRADES": "True",
+    "RESOLUTION": "1HOUR",
+    "ZSCORE_THRESH": "1.5",
+    "LEVERAGE": "1",
+    "CLOSE_AT_ZSCORE_CROSS": "True",
+    "ETHEREUM_ADDRESS": "0x0",
+    "STARK_PRIVATE_KEY_MAINNET": "",
+    "DYDX_API_KEY_MAINNET": "",
+    "DYDX_API_SECRET_MAINNET": "",
+    "DYDX_API_PASSPHRASE_MAINNET": "",
+    "STARK_PRIVATE_KEY_TESTNET": "",
+    "DYDX_API_KEY_TESTNET": "",
+    "DYDX_API_SECRET_TESTNET": "",
+    "DYDX_API_PASSPHRASE_TESTNET": "",
+    # Benchmarks measure the code, not the exchange rate limit
+    "API_RATE_LIMIT_REQUESTS": "1000000000",
+}
+
+# Stages in run order
+STAGES = ["construct_market_prices", "store_cointegration_results", "open_positions"]
+STAGES += ["manage_trade_exits"]
+
+
+# Synthetic close prices for benchmarking
+def make_price_panel(n_markets, n_bars, resolution_seconds=3600, seed=0):
+    """
+    About half the markets come in clusters sharing a random walk plus
+    stationary noise, so they are cointegrated; the rest are random walks
+    Returns a DataFrame indexed by candle startedAt, newest candle is now
+    """
+
+    import pandas as pd
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    prices = np.empty((n_bars, n_markets))
+
+    market = 0
+    while market < n_markets:
+        # Cointegrated cluster of 2 to 4 markets
+        if market < n_markets // 2:
+            size = min(int(rng.integers(2, 5)), n_markets // 2 - market)
+            size = max(size, 1)
+            common = rng.normal(0, 1, n_bars).cumsum()
+            for _ in range(size):
+                noise = np.zeros(n_bars)
+                shocks = rng.normal(0, 1, n_bars)
+                for t in range(1, n_bars):
+                    noise[t] = 0.8 * noise[t - 1] + shocks[t]
+                prices[:, market] = common * rng.uniform(0.5, 2.0) + noise
+                market += 1
+            continue
+
+        # Independent random walk
+        prices[:, market] = rng.normal(0, 1, n_bars).cumsum()
+        market += 1
+
+    # Keep prices positive
+    prices = prices - prices.min(axis=0) + rng.uniform(10, 1000, n_markets)
+
+    # Candle start times ending at the current candle
+    now = int(time.time())
+    last_started_at = now - now % resolution_seconds
+    index = [
+        datetime.utcfromtimestamp(
+            last_started_at - (n_bars - 1 - i) * resolution_seconds
+        ).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        for i in range(n_bars)
+    ]
+    columns = [f"SYN{i}-USD" for i in range(n_markets)]
+
+    return pd.DataFrame(prices, index=pd.Index(index, name="datetime"), columns=columns)
+
+
+# Class: Response wrapper matching dydx3
+class FakeResponse:
+
+    """
+    Holds data like dydx3 Response
+    """
+
+    # Initialize class
+    def __init__(self, data):
+        self.data = data
+
+
+# Class: In-memory exchange behind the fake client
+class FakeExchange:
+
+    """
+    Serves candles from a price panel and fills every order at once
+    Counts calls per endpoint and sleeps latency seconds on each one
+    """
+
+    # Initialize class
+    def __init__(self, panel_df, latency=0.0, resolution_seconds=3600):
+        self.panel_df = panel_df
+        self.latency = latency
+        self.resolution_seconds = resolution_seconds
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.orders = []
+        self.orders_by_id = {}
+        self.positions = {}
+        self.order_ids = itertools.count(1)
+
+        # Map candle start epoch to row
+        self.rows = {}
+        for row, started_at in enumerate(panel_df.index):
+            epoch = calendar.timegm(time.strptime(started_at[:19], "%Y-%m-%dT%H:%M:%S"))
+            self.rows[epoch] = row
+        self.last_epoch = max(self.rows.keys())
+
+    # Record and delay one call
+    def call(self, endpoint):
+        with self.lock:
+            self.calls[endpoint] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    # Candle dict for a row
+    def candle(self, market, row):
+        return {
+            "startedAt": self.panel_df.index[row],
+            "market": market,
+            "resolution": "1HOUR",
+            "close": str(self.panel_df[market].values[row]),
+        }
+
+    # Current price of a market
+    def price(self, market):
+        return float(self.panel_df[market].values[-1])
+
+    # Apply a filled order to positions
+    def fill(self, order):
+        size = float(order["size"]) * (1 if order["side"] == "BUY" else -1)
+        position = self.positions.get(order["market"], 0.0) + size
+        if abs(position) < 1e-12:
+            self.positions.pop(order["market"], None)
+        else:
+            self.positions[order["market"]] = position
+
+
+# Class: Fake client.public
+class FakePublic:
+
+    """
+    Public endpoints used by the bot
+    """
+
+    # Initialize class
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+    def get_markets(self, market=None):
+        self.exchange.call("get_markets")
+        markets = {}
+        for name in self.exchange.panel_df.columns:
+            markets[name] = {
+                "market": name,
+                "status": "ONLINE",
+                "type": "PERPETUAL",
+                "tickSize": "0.01",
+                "stepSize": "0.001",
+                "minOrderSize": "0.001",
+            }
+        return FakeResponse({"markets": markets})
+
+    def get_candles(
+        self, market, resolution=None, from_iso=None, to_iso=None, limit=None
+    ):
+        self.exchange.call("get_candles")
+        exchange = self.exchange
+        limit = limit or 100
+
+        # Newest candles first, like the exchange
+        to_epoch = exchange.last_epoch
+        if to_iso is not None:
+            to_epoch = calendar.timegm(time.strptime(to_iso[:19], "%Y-%m-%dT%H:%M:%S"))
+        from_epoch = None
+        if from_iso is not None:
+            from_epoch = calendar.timegm(
+                time.strptime(from_iso[:19], "%Y-%m-%dT%H:%M:%S")
+            )
+
+        candles = []
+        epoch = to_epoch - to_epoch % exchange.resolution_seconds
+        while len(candles) < limit:
+            if from_epoch is not None and epoch < from_epoch:
+                break
+            row = exchange.rows.get(epoch)
+            if row is None:
+                break
+            candles.append(exchange.candle(market, row))
+            epoch -= exchange.resolution_seconds
+
+        return FakeResponse({"candles": candles})
+
+    def get_time(self):
+        self.exchange.call("get_time")
+        return FakeResponse({"epoch": time.time()})
+
+
+# Class: Fake client.private
+class FakePrivate:
+
+    """
+    Private endpoints used by the bot, orders fill in full straight away
+    """
+
+    # Initialize class
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.network_id = 5
+        self.stark_private_key = None
+
+    def get_account(self):
+        self.exchange.call("get_account")
+        return FakeResponse(
+            {
+                "account": {
+                    "id": "bench",
+                    "positionId": "1",
+                    "freeCollateral": "100000",
+                    "quoteBalance": "100000",
+                }
+            }
+        )
+
+    def get_positions(self, market=None, status=None):
+        self.exchange.call("get_positions")
+        positions = []
+        for name, size in self.exchange.positions.items():
+            if market is not None and name != market:
+                continue
+            positions.append(
+                {
+                    "market": name,
+                    "side": "LONG" if size > 0 else "SHORT",
+                    "size": f"{size:.3f}",
+                    "sumOpen": f"{abs(size):.3f}",
+                    "entryPrice": str(self.exchange.price(name)),
+                }
+            )
+        return FakeResponse({"positions": positions})
+
+    def create_order(self, market, side, size, price, **kwargs):
+        self.exchange.call("create_order")
+        order = {
+            "id": f"order-{next(self.exchange.order_ids)}",
+            "market": market,
+            "side": side,
+            "size": size,
+            "price": price,
+            "status": "FILLED",
+            "createdAt": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        }
+        with self.exchange.lock:
+            self.exchange.orders.append(order)
+            self.exchange.orders_by_id[order["id"]] = order
+            self.exchange.fill(order)
+        return FakeResponse({"order": order})
+
+    def get_order_by_id(self, order_id):
+        self.exchange.call("get_order_by_id")
+        return FakeResponse({"order": self.exchange.orders_by_id[order_id]})
+
+    def get_orders(
+        self,
+        market=None,
+        status=None,
+        side=None,
+        order_type=None,
+        limit=100,
+        created_before_or_at=None,
+        returnLatestOrders=None,
+    ):
+        self.exchange.call("get_orders")
+        orders = []
+        for order in reversed(self.exchange.orders):
+            if market is not None and order["market"] != market:
+                continue
+            if status is not None and order["status"] != status:
+                continue
+            if created_before_or_at and order["createdAt"] > created_before_or_at:
+                continue
+            orders.append(order)
+            if len(orders) >= limit:
+                break
+        return FakeResponse({"orders": orders})
+
+    def cancel_order(self, order_id):
+        self.exchange.call("cancel_order")
+        return FakeResponse({})
+
+    def cancel_all_orders(self, market=None):
+        self.exchange.call("cancel_all_orders")
+        return FakeResponse({})
+
+
+# Class: Fake dydx3 client
+class FakeClient:
+
+    """
+    Same client.public and client.private surface the bot uses
+    """
+
+    # Initialize class
+    def __init__(self, panel_df, latency=0.0, resolution_seconds=3600):
+        self.exchange = FakeExchange(panel_df, latency, resolution_seconds)
+        self.public = FakePublic(self.exchange)
+        self.private = FakePrivate(self.exchange)
+
+
+# Time one stage
+def run_stage(stage, func, exchange, trace_memory):
+    exchange.calls.clear()
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    func()
+    wall_seconds = time.perf_counter() - start
+
+    peak_memory_mb = None
+    if trace_memory:
+        peak_memory_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return {
+        "stage": stage,
+        "wall_seconds": wall_seconds,
+        "api_calls": sum(exchange.calls.values()),
+        "api_calls_by_endpoint": dict(exchange.calls),
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+# Run every stage once for one panel size
+def run_benchmark(n_markets, n_bars, latency, seed, trace_memory):
+    # Fill in settings missing from the environment and .env
+    for name, value in BENCH_SETTINGS.items():
+        if config(name, default=None) is None:
+            os.environ[name] = value
+
+    # Stage modules keep their files in the working directory, start from cold
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_stages_") as work_dir:
+        os.chdir(work_dir)
+        os.environ["CANDLE_STORE_DIR"] = os.path.join(work_dir, "candle_store")
+        try:
+            return run_stages(n_markets, n_bars, latency, seed, trace_memory)
+        finally:
+            os.chdir(original_dir)
+
+
+# Run every stage in the current working directory
+def run_stages(n_markets, n_bars, latency, seed, trace_memory):
+    from constants import RESOLUTION
+    from func_utils import RESOLUTION_SECONDS
+    from func_public import construct_market_prices
+    from func_price_cache import save_market_prices, load_market_prices
+    from func_cointegration import store_cointegration_results
+    from func_entry_pairs import open_positions
+    from func_exit_pairs import manage_trade_exits
+
+    resolution_seconds = RESOLUTION_SECONDS[RESOLUTION]
+    panel_df = make_price_panel(n_markets, n_bars, resolution_seconds, seed)
+    client = FakeClient(panel_df, latency, resolution_seconds)
+
+    # Later stages run on the full panel, fetching is capped at 1000 candles
+    def load_panel():
+        save_market_prices(panel_df)
+
+    stage_funcs = {
+        "construct_market_prices": lambda: construct_market_prices(client),
+        "store_cointegration_results": lambda: store_cointegration_results(
+            load_market_prices()
+        ),
+        "open_positions": lambda: open_positions(client),
+        "manage_trade_exits": lambda: manage_trade_exits(client),
+    }
+
+    results = []
+    for stage in STAGES:
+        if stage == "store_cointegration_results":
+            load_panel()
+
+        result = run_stage(stage, stage_funcs[stage], client.exchange, trace_memory)
+        result.update(
+            {"markets": n_markets, "bars": n_bars, "latency_ms": latency * 1000}
+        )
+        results.append(result)
+
+    return results
+
+
+# Print one JSON line per stage and panel size
+# Usage: python bench_stages.py --markets 10 100 --bars 1000 10000 --latency-ms 50
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark trading stages")
+    parser.add_argument("--markets", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--bars", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace-memory", action="store_true")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Run one size in this process
+    if args.single:
+        for result in run_benchmark(
+            args.markets[0],
+            args.bars[0],
+            args.latency_ms / 1000,
+            args.seed,
+            not args.no_trace_memory,
+        ):
+            print("BENCH " + json.dumps(result))
+        sys.exit(0)
+
+    # Each size runs in a fresh interpreter so caches do not carry over
+    for n_markets, n_bars in itertools.product(args.markets, args.bars):
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--single",
+            "--markets",
+            str(n_markets),
+            "--bars",
+            str(n_bars),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--seed",
+            str(args.seed),
+        ]
+        if args.no_trace_memory:
+            command.append("--no-trace-memory")
+
+        output = subprocess.run(
+            command,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for line in output.splitlines():
+            if line.startswith("BENCH "):
+                print(line[len("BENCH ") :])
@@ -0,0 +1,69 @@
+import subprocess
+import statistics
+import json
+import sys
+import os
+
+# Modules each mode imports, mirroring the lazy imports in main.py
+MODE_IMPORTS = {
+    "main": ["main"],
+    "exit": ["main", "func_exit_pairs"],
+    "entry": ["main", "func_entry_pairs"],
+    "cointegration": ["main", "func_public", "func_cointegration"],
+    "abort": ["main", "func_private"],
+}
+
+# Heavy libraries worth reporting when loaded
+TRACKED_LIBRARIES = ["pandas", "numpy", "statsmodels", "scipy", "web3", "dydx3"]
+
+# Runs in a fresh interpreter per sample
+IMPORT_SCRIPT = """
+import time, sys, json
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    __import__(module)
+elapsed = time.perf_counter() - start
+loaded = [m for m in {tracked} if m in sys.modules]
+print(json.dumps({{"import_seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+# Time one mode's imports in a fresh interpreter
+def measure_mode(mode, repeats):
+    import_seconds = []
+    loaded = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                IMPORT_SCRIPT.format(tracked=TRACKED_LIBRARIES),
+                *MODE_IMPORTS[mode],
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        import_seconds.append(sample["import_seconds"])
+        loaded = sample["loaded"]
+
+    return {
+        "mode": mode,
+        "repeats": repeats,
+        "median_seconds": statistics.median(import_seconds),
+        "min_seconds": min(import_seconds),
+        "max_seconds": max(import_seconds),
+        "loaded": loaded,
+    }
+
+
+# Print one JSON line per mode
+# Usage: python bench_startup.py [repeats] [mode ...]
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    modes = sys.argv[2:] or list(MODE_IMPORTS.keys())
+
+    for mode in modes:
+        print(json.dumps(measure_mode(mode, repeats)))
@@ -1,6 +1,11 @@
-from dydx3.constants import API_HOST_GOERLI, API_HOST_MAINNET
 from decouple import config
 
+# Same values as dydx3.constants, kept here so importing constants stays cheap
+API_HOST_MAINNET = "https://api.dydx.exchange"
+API_HOST_GOERLI = "https://api.stage.dydx.exchange"
+NETWORK_ID_MAINNET = 1
+NETWORK_ID_GOERLI = 5
+
 # !!!! SELECT MODE !!!!
 MODE = config("MODE")
 
@@ -16,9 +21,84 @@ MANAGE_EXITS = config("MANAGE_EXITS", cast=bool)
 # Place Trades
 PLACE_TRADES = config("PLACE_TRADES", cast=bool)
 
+# Daemon - keep running and trade on a timer instead of one run per cron call
+DAEMON_MODE = config("DAEMON_MODE", default=False, cast=bool)
+DAEMON_TICK_SECONDS = config("DAEMON_TICK_SECONDS", default=300, cast=int)
+DAEMON_TICK_OFFSET_SECONDS = config("DAEMON_TICK_OFFSET_SECONDS", default=5, cast=int)
+DAEMON_REFRESH_SECONDS = config("DAEMON_REFRESH_SECONDS", default=86400, cast=int)
+
+# Live prices - stream trades over websocket in daemon mode
+STREAM_PRICES = config("STREAM_PRICES", default=False, cast=bool)
+
 # Resolution
 RESOLUTION = config("RESOLUTION")
 
+# Rate limits - dYdX allows 175 GET requests per 10 seconds
+API_RATE_LIMIT_REQUESTS = config("API_RATE_LIMIT_REQUESTS", default=175, cast=int)
+API_RATE_LIMIT_SECONDS = config("API_RATE_LIMIT_SECONDS", default=10, cast=float)
+
+# Concurrent candle downloads
+CANDLE_FETCH_WORKERS = config("CANDLE_FETCH_WORKERS", default=8, cast=int)
+
+# Keep-alive connections kept open to the API, at least one per fetch worker
+API_POOL_SIZE = config("API_POOL_SIZE", default=16, cast=int)
+
+# Local candle store, only the missing tail is downloaded each run
+CANDLE_STORE_DIR = config("CANDLE_STORE_DIR", default="candle_store")
+
+# Cointegration screening - batched fixed-lag ADF before the full coint test
+# Candidates with t-stat below the cutoff go on to statsmodels coint
+COINT_SCREEN = config("COINT_SCREEN", default=True, cast=bool)
+COINT_SCREEN_LAGS = config("COINT_SCREEN_LAGS", default=1, cast=int)
+
+# -2.5 sits well above the 5% Engle-Granger critical value of about -3.34
+# Roughly 26-29% of independent random-walk pairs still pass at this cutoff
+# coint picks its lags by AIC, so a pair it accepts can in rare cases fail the
+# fixed-lag screen - set COINT_SCREEN to False for the exact unscreened scan
+COINT_SCREEN_TSTAT = config("COINT_SCREEN_TSTAT", default=-2.5, cast=float)
+
+# Cointegration screening - working memory per batch of pairs in megabytes
+COINT_SCREEN_MEMORY_MB = config("COINT_SCREEN_MEMORY_MB", default=256, cast=float)
+
+# Cointegration scan - longest half life in candles a pair may have
+MAX_HALF_LIFE = config("MAX_HALF_LIFE", default=24, cast=float)
+
+# Cointegration scan worker processes - 1 runs in process, 0 uses every core
+COINT_WORKERS = config("COINT_WORKERS", default=1, cast=int)
+
+# Market metadata - how long tick and step sizes are cached
+MARKET_METADATA_TTL = config("MARKET_METADATA_TTL", default=3600, cast=float)
+
+# Order placement - how often to resync the server clock offset
+ORDER_CLOCK_REFRESH_SECONDS = config(
+    "ORDER_CLOCK_REFRESH_SECONDS", default=600, cast=float
+)
+
+# Order confirmation - poll with exponential backoff until filled or cancelled
+ORDER_CONFIRM_TIMEOUT = config("ORDER_CONFIRM_TIMEOUT", default=17, cast=float)
+ORDER_POLL_INITIAL_DELAY = config("ORDER_POLL_INITIAL_DELAY", default=0.1, cast=float)
+ORDER_POLL_MAX_DELAY = config("ORDER_POLL_MAX_DELAY", default=1, cast=float)
+
+# Order execution - submit both legs of a pair at the same time
+SIMULTANEOUS_LEGS = config("SIMULTANEOUS_LEGS", default=False, cast=bool)
+
+# Rolling windows - hedge ratio and z-score
+HEDGE_RATIO_WINDOW = config("HEDGE_RATIO_WINDOW", default=168, cast=int)
+ZSCORE_WINDOW = config("ZSCORE_WINDOW", default=72, cast=int)
+
+# Metrics - one JSON line per tick or refresh, rotated by size, empty disables
+METRICS_FILE = config("METRICS_FILE", default="metrics.jsonl")
+METRICS_FILE_MAX_BYTES = config("METRICS_FILE_MAX_BYTES", default=5000000, cast=int)
+METRICS_FILE_BACKUPS = config("METRICS_FILE_BACKUPS", default=3, cast=int)
+
+# Profiling - capture the first tick with cProfile, also set by --profile
+PROFILE_TICK = config("PROFILE_TICK", default=False, cast=bool)
+PROFILE_FILE = config("PROFILE_FILE", default="tick.prof")
+
+# Backtest costs - taker fee and slippage as a fraction of traded notional
+BACKTEST_FEE_RATE = config("BACKTEST_FEE_RATE", default=0.0005, cast=float)
+BACKTEST_SLIPPAGE_RATE = config("BACKTEST_SLIPPAGE_RATE", default=0.0005, cast=float)
+
 # Thresholds - Opening
 ZSCORE_THRESH = config("ZSCORE_THRESH", cast=float)
 LEVERAGE = config("LEVERAGE", cast=int)
@@ -55,8 +135,20 @@ DYDX_API_PASSPHRASE = (
     DYDX_API_PASSPHRASE_MAINNET if MODE == "PRODUCTION" else DYDX_API_PASSPHRASE_TESTNET
 )
 
-# HOST - Export
-HOST = API_HOST_MAINNET if MODE == "PRODUCTION" else API_HOST_GOERLI
+# HOST - Export, override API_HOST to use a local exchange simulator
+HOST = config(
+    "API_HOST",
+    default=API_HOST_MAINNET if MODE == "PRODUCTION" else API_HOST_GOERLI,
+)
+NETWORK_ID = NETWORK_ID_MAINNET if MODE == "PRODUCTION" else NETWORK_ID_GOERLI
+
+# WEBSOCKET - Export, override STREAM_HOST to use a local replay server
+WS_HOST_MAINNET = "wss://api.dydx.exchange/v3/ws"
+WS_HOST_GOERLI = "wss://api.stage.dydx.exchange/v3/ws"
+STREAM_HOST = config(
+    "STREAM_HOST",
+    default=WS_HOST_MAINNET if MODE == "PRODUCTION" else WS_HOST_GOERLI,
+)
 
 # HTTP PROVIDER
 HTTP_PROVIDER_MAINNET = (
@@ -66,3 +158,12 @@ HTTP_PROVIDER_TESTNET = (
     "https://eth-goerli.g.alchemy.com/v2/gx_YPJc6PjPigcf1qb8k76Sp44YUJLVI"
 )
 HTTP_PROVIDER = HTTP_PROVIDER_MAINNET if MODE == "PRODUCTION" else HTTP_PROVIDER_TESTNET
+
+# TELEGRAM - Override TELEGRAM_API_URL to test against a local stub
+TELEGRAM_TOKEN = config("TELEGRAM_TOKEN", default="")
+TELEGRAM_CHAT_ID = config("TELEGRAM_CHAT_ID", default="")
+TELEGRAM_API_URL = config("TELEGRAM_API_URL", default="https://api.telegram.org")
+TELEGRAM_BATCH_SECONDS = config("TELEGRAM_BATCH_SECONDS", default=1.0, cast=float)
+TELEGRAM_MAX_RETRIES = config("TELEGRAM_MAX_RETRIES", default=5, cast=int)
+TELEGRAM_TIMEOUT = config("TELEGRAM_TIMEOUT", default=10, cast=float)
+TELEGRAM_FLUSH_SECONDS = config("TELEGRAM_FLUSH_SECONDS", default=10, cast=float)
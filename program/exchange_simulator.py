@@ -0,0 +1,775 @@
+"""
+Local dYdX REST simulator for running full ticks offline
+Serves the v3 endpoints the bot uses from in-memory state, run with:
+    python exchange_simulator.py --port 8080 --latency-ms 50 --partial-fill-rate 0.1
+and point the bot at it with API_HOST=http://localhost:8080
+Orders are still signed locally, so STARK_PRIVATE_KEY must hold a valid key
+and markets must be ones dydx3 can sign for: synthetic panels are named after
+DYDX_MARKETS, and a --prices CSV needs columns from the same list
+Latency from trade decision to fill is served at /sim/stats and printed on exit
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime
+from collections import Counter, deque
+import pandas as pd
+import numpy as np
+import itertools
+import threading
+import argparse
+import calendar
+import random
+import json
+import time
+import re
+
+from func_utils import RESOLUTION_SECONDS
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# Markets dydx3 can sign orders for, same as dydx3.constants.SYNTHETIC_ASSET_MAP
+DYDX_MARKETS = [
+    "BTC-USD",
+    "ETH-USD",
+    "LINK-USD",
+    "AAVE-USD",
+    "UNI-USD",
+    "SUSHI-USD",
+    "SOL-USD",
+    "YFI-USD",
+    "1INCH-USD",
+    "AVAX-USD",
+    "SNX-USD",
+    "CRV-USD",
+    "UMA-USD",
+    "DOT-USD",
+    "DOGE-USD",
+    "MATIC-USD",
+    "MKR-USD",
+    "FIL-USD",
+    "ADA-USD",
+    "ATOM-USD",
+    "COMP-USD",
+    "BCH-USD",
+    "LTC-USD",
+    "EOS-USD",
+    "ALGO-USD",
+    "ZRX-USD",
+    "XMR-USD",
+    "ZEC-USD",
+    "ENJ-USD",
+    "ETC-USD",
+    "XLM-USD",
+    "TRX-USD",
+    "XTZ-USD",
+    "ICP-USD",
+    "RUNE-USD",
+    "LUNA-USD",
+    "NEAR-USD",
+    "CELO-USD",
+]
+
+# Seconds prepare_market_order adds to the decision time for order expiration
+ORDER_EXPIRY_SECONDS = 70
+
+
+# Format epoch seconds like the API
+def format_time(epoch):
+    return datetime.utcfromtimestamp(epoch).strftime(TIME_FORMAT)[:-4] + "Z"
+
+
+# Parse an API time to epoch seconds
+def parse_time(iso):
+    seconds = calendar.timegm(time.strptime(iso[:19], "%Y-%m-%dT%H:%M:%S"))
+    fraction = iso[19:].rstrip("Z")
+    return seconds + (float(fraction) if fraction.startswith(".") else 0.0)
+
+
+# Percentiles of a list of seconds, in milliseconds
+def summarize_latency(seconds):
+    if len(seconds) == 0:
+        return {"count": 0}
+
+    values = np.array(seconds) * 1000
+    return {
+        "count": int(len(values)),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+# Class: Raised to send an API error response
+class SimulatorError(Exception):
+    """
+    Carries the HTTP status and message of a dYdX style error
+    """
+
+    # Initialize class
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+# Class: In-memory exchange state
+class SimulatedExchange:
+    """
+    Markets and candles come from a price panel whose last row is the current
+    candle, orders fill against the last close after fill_delay seconds
+    FOK orders cancel unless fully marketable with enough liquidity, IOC
+    orders keep what filled, GTT orders rest and fill the rest later
+    """
+
+    # Initialize class
+    def __init__(
+        self,
+        prices_df,
+        resolution="1HOUR",
+        fill_delay=0.05,
+        partial_fill_rate=0.0,
+        cancel_rate=0.0,
+        rate_limit=175,
+        rate_window=10.0,
+        error_rate=0.0,
+        starting_balance=100000.0,
+        seed=None,
+    ):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.resolution = resolution
+        self.resolution_seconds = RESOLUTION_SECONDS[resolution]
+        self.fill_delay = fill_delay
+        self.partial_fill_rate = partial_fill_rate
+        self.cancel_rate = cancel_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+
+        # Last row is always the candle open now
+        self.markets = list(prices_df.columns)
+        self.closes = {m: prices_df[m].to_numpy(dtype=float) for m in self.markets}
+        self.n_rows = len(prices_df)
+
+        # Account state
+        self.quote_balance = starting_balance
+        self.positions = {}
+        self.orders = {}
+        self.order_ids = itertools.count(1)
+
+        # Request and latency accounting
+        self.request_times = deque()
+        self.requests = Counter()
+        self.rate_limited = 0
+        self.order_statuses = Counter()
+
+    # Refuse the request if over the rate limit or an error is injected
+    def check_rate_limit(self, endpoint):
+        with self.lock:
+            now = time.monotonic()
+            self.requests[endpoint] += 1
+            while (
+                self.request_times and self.request_times[0] <= now - self.rate_window
+            ):
+                self.request_times.popleft()
+
+            over_limit = self.rate_limit and len(self.request_times) >= self.rate_limit
+            injected = self.random.random() < self.error_rate
+            if over_limit or injected:
+                self.rate_limited += 1
+                retry_after = self.rate_window
+                if self.request_times:
+                    retry_after = self.request_times[0] + self.rate_window - now
+                raise SimulatorError(
+                    429,
+                    "Too many requests",
+                    {
+                        "RateLimit-Limit": str(self.rate_limit),
+                        "RateLimit-Remaining": "0",
+                        "Retry-After": str(max(1, int(retry_after * 1000))),
+                    },
+                )
+
+            self.request_times.append(now)
+
+    # Start of the candle open now
+    def current_started_at(self):
+        now = int(time.time())
+        return now - now % self.resolution_seconds
+
+    # Current price of a market
+    def mark_price(self, market):
+        return float(self.closes[market][-1])
+
+    # Guard: Unknown markets are a 400 like the API
+    def check_market(self, market):
+        if market not in self.closes:
+            raise SimulatorError(400, f"Invalid market: {market}")
+
+    def get_markets(self, query):
+        markets = {}
+        for market in self.markets:
+            price = self.mark_price(market)
+            markets[market] = {
+                "market": market,
+                "status": "ONLINE",
+                "type": "PERPETUAL",
+                "baseAsset": market.split("-")[0],
+                "quoteAsset": "USD",
+                "tickSize": "0.01",
+                "stepSize": "0.001",
+                "minOrderSize": "0.001",
+                "indexPrice": str(price),
+                "oraclePrice": str(price),
+                "initialMarginFraction": "0.05",
+                "maintenanceMarginFraction": "0.03",
+            }
+
+        market = query.get("market")
+        if market is not None:
+            self.check_market(market)
+            markets = {market: markets[market]}
+
+        return {"markets": markets}
+
+    def get_candles(self, market, query):
+        self.check_market(market)
+        limit = min(int(query.get("limit", 100)), 100)
+
+        # Newest first, starting at toISO
+        last_started_at = self.current_started_at()
+        to_epoch = last_started_at
+        if "toISO" in query:
+            to_epoch = min(to_epoch, parse_time(query["toISO"]))
+        from_epoch = None
+        if "fromISO" in query:
+            from_epoch = parse_time(query["fromISO"])
+
+        candles = []
+        started_at = int(to_epoch) - int(to_epoch) % self.resolution_seconds
+        while len(candles) < limit:
+            if from_epoch is not None and started_at < from_epoch:
+                break
+
+            row = (
+                self.n_rows
+                - 1
+                - (last_started_at - started_at) // self.resolution_seconds
+            )
+            if row < 0:
+                break
+
+            close = str(self.closes[market][row])
+            candles.append(
+                {
+                    "startedAt": format_time(started_at),
+                    "updatedAt": format_time(started_at),
+                    "market": market,
+                    "resolution": self.resolution,
+                    "low": close,
+                    "high": close,
+                    "open": close,
+                    "close": close,
+                    "baseTokenVolume": "0",
+                    "trades": "0",
+                    "usdVolume": "0",
+                    "startingOpenInterest": "0",
+                }
+            )
+            started_at -= self.resolution_seconds
+
+        return {"candles": candles}
+
+    def get_time(self, query):
+        now = time.time()
+        return {"iso": format_time(now), "epoch": now}
+
+    # Settle every order whose fill time has passed
+    def settle_orders(self):
+        now = time.time()
+        for order in self.orders.values():
+            # Settle at the scheduled time, not when first looked at
+            while order["status"] in ("PENDING", "OPEN") and order["_fill_at"] <= now:
+                self.settle_order(order, order["_fill_at"])
+
+    # Match one order against the last close
+    def settle_order(self, order, now):
+        market = order["market"]
+        price = float(order["price"])
+        mark = self.mark_price(market)
+        remaining = float(order["remainingSize"])
+
+        # Liquidity available at the mark for this attempt
+        marketable = price >= mark if order["side"] == "BUY" else price <= mark
+        available = remaining
+        if not marketable or self.random.random() < self.cancel_rate:
+            available = 0.0
+        elif self.random.random() < self.partial_fill_rate:
+            available = round(remaining * self.random.uniform(0.1, 0.9), 3)
+
+        # Fill or kill
+        if order["timeInForce"] == "FOK" and available < remaining:
+            self.finish_order(order, "CANCELED", now, "FAILED")
+            return
+
+        if available > 0:
+            self.fill(order, available, mark, now)
+            remaining = float(order["remainingSize"])
+
+        if remaining <= 0:
+            self.finish_order(order, "FILLED", now)
+        elif order["timeInForce"] == "IOC":
+            self.finish_order(order, "CANCELED", now, "UNDERCOLLATERALIZED")
+        else:
+            order["status"] = "OPEN"
+            order["_fill_at"] = now + self.fill_delay
+
+    # Apply a fill to the position and balance
+    def fill(self, order, size, price, now):
+        market = order["market"]
+        signed_size = size if order["side"] == "BUY" else -size
+        position = self.positions.get(market)
+
+        order["remainingSize"] = f"{float(order['remainingSize']) - size:.3f}"
+        self.quote_balance -= signed_size * price
+
+        # Open, add to, reduce or flip the position
+        if position is None:
+            position = {
+                "size": 0.0,
+                "entryPrice": price,
+                "sumOpen": 0.0,
+                "sumClose": 0.0,
+                "createdAt": format_time(now),
+            }
+            self.positions[market] = position
+
+        old_size = position["size"]
+        new_size = old_size + signed_size
+        if old_size == 0 or (old_size > 0) == (signed_size > 0):
+            total = abs(old_size) + size
+            position["entryPrice"] = (
+                position["entryPrice"] * abs(old_size) + price * size
+            ) / total
+            position["sumOpen"] += size
+        else:
+            position["sumClose"] += min(size, abs(old_size))
+            if abs(new_size) > 1e-9 and (new_size > 0) != (old_size > 0):
+                position["entryPrice"] = price
+                position["sumOpen"] = abs(new_size)
+
+        position["size"] = round(new_size, 9)
+        if abs(position["size"]) < 1e-9:
+            del self.positions[market]
+
+    # Move an order to a final status
+    def finish_order(self, order, status, now, cancel_reason=None):
+        order["status"] = status
+        order["cancelReason"] = cancel_reason
+        order["_finished_at"] = now
+        self.order_statuses[status] += 1
+
+    # Public view of an order, recording when the bot first sees its outcome
+    def view_order(self, order):
+        if order["status"] in ("FILLED", "CANCELED") and order["_seen_at"] is None:
+            order["_seen_at"] = time.time()
+        return {k: v for k, v in order.items() if not k.startswith("_")}
+
+    def get_account(self, query):
+        with self.lock:
+            self.settle_orders()
+            equity = self.quote_balance
+            margin = 0.0
+            for market, position in self.positions.items():
+                notional = position["size"] * self.mark_price(market)
+                equity += notional
+                margin += abs(notional) * 0.05
+
+            return {
+                "account": {
+                    "id": "simulated-account",
+                    "positionId": "1",
+                    "starkKey": "0",
+                    "equity": f"{equity:.6f}",
+                    "freeCollateral": f"{equity - margin:.6f}",
+                    "quoteBalance": f"{self.quote_balance:.6f}",
+                    "pendingDeposits": "0",
+                    "pendingWithdrawals": "0",
+                    "openPositions": self.view_positions(),
+                    "accountNumber": "0",
+                }
+            }
+
+    # Positions in API format keyed by market
+    def view_positions(self):
+        positions = {}
+        for market, position in self.positions.items():
+            mark = self.mark_price(market)
+            positions[market] = {
+                "market": market,
+                "status": "OPEN",
+                "side": "LONG" if position["size"] > 0 else "SHORT",
+                "size": f"{position['size']:.3f}",
+                "maxSize": f"{position['size']:.3f}",
+                "entryPrice": str(position["entryPrice"]),
+                "exitPrice": None,
+                "unrealizedPnl": str(
+                    (mark - position["entryPrice"]) * position["size"]
+                ),
+                "realizedPnl": "0",
+                "createdAt": position["createdAt"],
+                "closedAt": None,
+                "sumOpen": f"{position['sumOpen']:.3f}",
+                "sumClose": f"{position['sumClose']:.3f}",
+            }
+        return positions
+
+    def get_positions(self, query):
+        with self.lock:
+            self.settle_orders()
+            positions = list(self.view_positions().values())
+
+        # Only open positions are kept
+        if query.get("status", "OPEN") != "OPEN":
+            positions = []
+        if "market" in query:
+            positions = [p for p in positions if p["market"] == query["market"]]
+
+        return {"positions": positions}
+
+    def create_order(self, body):
+        self.check_market(body.get("market"))
+        now = time.time()
+
+        # Decision time is when the bot signed the order
+        decided_at = None
+        if body.get("expiration"):
+            decided_at = parse_time(body["expiration"]) - ORDER_EXPIRY_SECONDS
+
+        with self.lock:
+            order_id = f"sim-{next(self.order_ids)}"
+            order = {
+                "id": order_id,
+                "clientId": body.get("clientId"),
+                "accountId": "simulated-account",
+                "market": body["market"],
+                "side": body["side"],
+                "price": body["price"],
+                "triggerPrice": body.get("triggerPrice"),
+                "trailingPercent": body.get("trailingPercent"),
+                "size": body["size"],
+                "remainingSize": body["size"],
+                "type": body.get("type", "MARKET"),
+                "createdAt": format_time(now),
+                "unfillableAt": None,
+                "expiresAt": body.get("expiration"),
+                "status": "PENDING",
+                "timeInForce": body.get("timeInForce", "GTT"),
+                "postOnly": body.get("postOnly", False),
+                "reduceOnly": body.get("reduceOnly", False),
+                "cancelReason": None,
+                "_decided_at": decided_at,
+                "_received_at": now,
+                "_fill_at": now + self.fill_delay,
+                "_finished_at": None,
+                "_seen_at": None,
+            }
+            self.orders[order_id] = order
+
+            return {"order": self.view_order(order)}
+
+    def get_orders(self, query):
+        limit = int(query.get("limit", 100))
+        with self.lock:
+            self.settle_orders()
+
+            # Newest first
+            orders = []
+            for order in sorted(
+                self.orders.values(), key=lambda o: o["_received_at"], reverse=True
+            ):
+                if "market" in query and order["market"] != query["market"]:
+                    continue
+                if "status" in query and order["status"] != query["status"]:
+                    continue
+                if "side" in query and order["side"] != query["side"]:
+                    continue
+                if "type" in query and order["type"] != query["type"]:
+                    continue
+                if (
+                    "createdBeforeOrAt" in query
+                    and order["createdAt"] > query["createdBeforeOrAt"]
+                ):
+                    continue
+
+                orders.append(self.view_order(order))
+                if len(orders) >= limit:
+                    break
+
+            return {"orders": orders}
+
+    def get_order(self, order_id, query):
+        with self.lock:
+            self.settle_orders()
+            order = self.orders.get(order_id)
+            if order is None:
+                raise SimulatorError(404, "Order not found")
+
+            return {"order": self.view_order(order)}
+
+    def cancel_order(self, order_id, query):
+        with self.lock:
+            self.settle_orders()
+            order = self.orders.get(order_id)
+            if order is None:
+                raise SimulatorError(404, "Order not found")
+            if order["status"] in ("PENDING", "OPEN"):
+                self.finish_order(order, "CANCELED", time.time(), "USER_CANCELED")
+
+            return {"cancelOrder": self.view_order(order)}
+
+    def cancel_all_orders(self, query):
+        with self.lock:
+            self.settle_orders()
+            canceled = []
+            for order in self.orders.values():
+                if "market" in query and order["market"] != query["market"]:
+                    continue
+                if order["status"] in ("PENDING", "OPEN"):
+                    self.finish_order(order, "CANCELED", time.time(), "USER_CANCELED")
+                    canceled.append(self.view_order(order))
+
+            return {"cancelOrders": canceled}
+
+    # Latency from decision to fill and request counts
+    def stats(self, query=None):
+        with self.lock:
+            self.settle_orders()
+            latencies = {
+                "decision_to_submit": [],
+                "submit_to_fill": [],
+                "decision_to_fill": [],
+                "decision_to_confirm": [],
+            }
+            for order in self.orders.values():
+                if order["status"] != "FILLED":
+                    continue
+
+                decided_at = order["_decided_at"] or order["_received_at"]
+                finished_at = order["_finished_at"]
+                latencies["decision_to_submit"].append(
+                    order["_received_at"] - decided_at
+                )
+                latencies["submit_to_fill"].append(finished_at - order["_received_at"])
+                latencies["decision_to_fill"].append(finished_at - decided_at)
+                if order["_seen_at"] is not None:
+                    latencies["decision_to_confirm"].append(
+                        order["_seen_at"] - decided_at
+                    )
+
+            return {
+                "requests": dict(self.requests),
+                "rate_limited": self.rate_limited,
+                "orders": dict(self.order_statuses),
+                "latency": {
+                    name: summarize_latency(values)
+                    for name, values in latencies.items()
+                },
+            }
+
+
+# Build request handler
+def make_handler(exchange, latency=0.0, jitter=0.0):
+    # Routes as (method, path pattern, endpoint, handler)
+    routes = [
+        ("GET", r"/v3/markets", "markets", lambda m, q, b: exchange.get_markets(q)),
+        (
+            "GET",
+            r"/v3/candles/([^/]+)",
+            "candles",
+            lambda m, q, b: exchange.get_candles(m[0], q),
+        ),
+        ("GET", r"/v3/time", "time", lambda m, q, b: exchange.get_time(q)),
+        (
+            "GET",
+            r"/v3/accounts/[^/]+",
+            "accounts",
+            lambda m, q, b: exchange.get_account(q),
+        ),
+        (
+            "GET",
+            r"/v3/positions",
+            "positions",
+            lambda m, q, b: exchange.get_positions(q),
+        ),
+        ("GET", r"/v3/orders", "orders", lambda m, q, b: exchange.get_orders(q)),
+        (
+            "GET",
+            r"/v3/orders/([^/]+)",
+            "orders",
+            lambda m, q, b: exchange.get_order(m[0], q),
+        ),
+        ("POST", r"/v3/orders", "orders", lambda m, q, b: exchange.create_order(b)),
+        (
+            "DELETE",
+            r"/v3/orders/([^/]+)",
+            "orders",
+            lambda m, q, b: exchange.cancel_order(m[0], q),
+        ),
+        (
+            "DELETE",
+            r"/v3/orders",
+            "orders",
+            lambda m, q, b: exchange.cancel_all_orders(q),
+        ),
+    ]
+
+    class SimulatorHandler(BaseHTTPRequestHandler):
+        """
+        Routes v3 requests to the simulated exchange
+        """
+
+        # Keep-alive so pooled connections are reused
+        protocol_version = "HTTP/1.1"
+
+        def handle_request(self, method):
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+            # Read body even on errors so the connection stays usable
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+
+            # Simulator stats are not rate limited or delayed
+            if method == "GET" and url.path == "/sim/stats":
+                self.send_json(200, exchange.stats())
+                return
+
+            # Network latency
+            if latency > 0 or jitter > 0:
+                time.sleep(latency + random.uniform(0, jitter))
+
+            try:
+                for route_method, pattern, endpoint, handler in routes:
+                    match = re.fullmatch(pattern, url.path)
+                    if route_method != method or match is None:
+                        continue
+
+                    exchange.check_rate_limit(f"{method} /v3/{endpoint}")
+                    body = json.loads(raw_body) if raw_body else {}
+                    self.send_json(200, handler(match.groups(), query, body))
+                    return
+
+                raise SimulatorError(404, f"No route for {method} {url.path}")
+
+            except SimulatorError as e:
+                self.send_json(e.status, {"errors": [{"msg": e.message}]}, e.headers)
+
+        def send_json(self, status, data, headers=None):
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self.handle_request("GET")
+
+        def do_POST(self):
+            self.handle_request("POST")
+
+        def do_DELETE(self):
+            self.handle_request("DELETE")
+
+        # Quiet request logging
+        def log_message(self, format, *args):
+            pass
+
+    return SimulatorHandler
+
+
+# Run simulator until interrupted
+def serve(exchange, host, port, latency=0.0, jitter=0.0):
+    server = ThreadingHTTPServer((host, port), make_handler(exchange, latency, jitter))
+    server.daemon_threads = True
+    print(f"Simulating {len(exchange.markets)} markets on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(exchange.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the dYdX REST API")
+    parser.add_argument(
+        "--prices", help="CSV of closes, one column per market, oldest row first"
+    )
+    parser.add_argument("--markets", type=int, default=20)
+    parser.add_argument("--bars", type=int, default=1000)
+    parser.add_argument("--resolution", default="1HOUR")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fill-delay-ms", type=float, default=50.0)
+    parser.add_argument("--partial-fill-rate", type=float, default=0.0)
+    parser.add_argument("--cancel-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=175)
+    parser.add_argument("--rate-window", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--balance", type=float, default=100000.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    # Recorded closes or a synthetic panel
+    if args.prices:
+        prices_df = pd.read_csv(args.prices, index_col=0)
+    else:
+        from bench_stages import make_price_panel
+
+        # Guard: Orders can only be signed for real market names
+        if args.markets > len(DYDX_MARKETS):
+            parser.error(f"--markets can be at most {len(DYDX_MARKETS)}")
+
+        prices_df = make_price_panel(
+            args.markets,
+            args.bars,
+            RESOLUTION_SECONDS[args.resolution],
+            seed=args.seed or 0,
+        )
+        prices_df.columns = DYDX_MARKETS[: args.markets]
+
+    # Guard: Unsignable markets would fail every order
+    unknown_markets = [m for m in prices_df.columns if m not in DYDX_MARKETS]
+    if unknown_markets:
+        parser.error(f"Markets dydx3 cannot sign orders for: {unknown_markets}")
+
+    exchange = SimulatedExchange(
+        prices_df,
+        resolution=args.resolution,
+        fill_delay=args.fill_delay_ms / 1000,
+        partial_fill_rate=args.partial_fill_rate,
+        cancel_rate=args.cancel_rate,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        error_rate=args.error_rate,
+        starting_balance=args.balance,
+        seed=args.seed,
+    )
+    serve(
+        exchange,
+        args.host,
+        args.port,
+        args.latency_ms / 1000,
+        args.jitter_ms / 1000,
+    )
@@ -0,0 +1,203 @@
+from constants import (
+    ZSCORE_THRESH,
+    HEDGE_RATIO_WINDOW,
+    ZSCORE_WINDOW,
+    BACKTEST_FEE_RATE,
+    BACKTEST_SLIPPAGE_RATE,
+)
+from func_cointegration import calculate_rolling_hedge_ratio, calculate_rolling_zscores
+import pandas as pd
+import numpy as np
+import json
+import sys
+import time
+
+# Output of the command line backtest
+BACKTEST_RESULTS_FILE = "backtest_results.csv"
+
+
+# Forward fill along time using the last index where a condition held
+def last_index_where(condition, default):
+    rows = np.arange(condition.shape[0]).reshape((-1,) + (1,) * (condition.ndim - 1))
+    return np.maximum.accumulate(np.where(condition, rows, default), axis=0)
+
+
+# Calculate ZScore for every pair over time
+def calculate_pair_zscores(
+    prices,
+    base_columns,
+    quote_columns,
+    hedge_window=HEDGE_RATIO_WINDOW,
+    zscore_window=ZSCORE_WINDOW,
+):
+    """
+    Same as calculate_hedge_ratio_and_spread then calculate_zscore per pair
+    Returns (time, pair) arrays of base prices, quote prices and ZScores
+    """
+
+    prices = np.asarray(prices, dtype=float)
+    series_1 = prices[:, base_columns]
+    series_2 = prices[:, quote_columns]
+
+    hedge_ratio = calculate_rolling_hedge_ratio(series_1, series_2, hedge_window)
+    spread = series_1 - series_2 * hedge_ratio
+    z_scores = calculate_rolling_zscores(spread, zscore_window)
+
+    return series_1, series_2, z_scores
+
+
+# Positions the entry and exit rules would hold
+def calculate_pair_positions(z_scores, zscore_thresh=ZSCORE_THRESH):
+    """
+    Entry as open_positions - abs(z) >= zscore_thresh, buy base when z < 0
+    Exit as manage_trade_exits with CLOSE_AT_ZSCORE_CROSS - z changes sign
+    Returns +1 long spread, -1 short spread or 0 per bar, held into the next bar
+
+    Each pair is simulated on its own, so the live rule of one open pair
+    per market is not applied
+    """
+
+    # Sign of ZScore, carried over NaN and zero like the live exit check
+    sign = np.sign(np.nan_to_num(z_scores))
+    last_signed = last_index_where(sign != 0, -1)
+    sign = np.take_along_axis(sign, np.maximum(last_signed, 0), axis=0)
+    sign[last_signed < 0] = 0
+
+    # Each run of one sign starts where the previous run was exited
+    flipped = np.ones(sign.shape, dtype=bool)
+    flipped[1:] = sign[1:] != sign[:-1]
+    run_start = last_index_where(flipped, 0)
+
+    # In a trade from the first trigger in a run until the sign flips
+    with np.errstate(invalid="ignore"):
+        triggered = np.abs(z_scores) >= zscore_thresh
+    last_trigger = last_index_where(triggered, -1)
+    in_trade = (last_trigger >= run_start) & (sign != 0)
+
+    return (-sign * in_trade).astype(np.int8)
+
+
+# Backtest entry and exit rules on a price matrix
+def backtest_pairs(
+    prices,
+    base_columns,
+    quote_columns,
+    zscore_thresh=ZSCORE_THRESH,
+    hedge_window=HEDGE_RATIO_WINDOW,
+    zscore_window=ZSCORE_WINDOW,
+    fee_rate=BACKTEST_FEE_RATE,
+    slippage_rate=BACKTEST_SLIPPAGE_RATE,
+    position_size=1.0,
+    z_scores=None,
+):
+    """
+    Vectorized over time and pairs, each leg trades position_size notional
+    at the candle close, sized at entry like open_positions
+    Costs are fee_rate + slippage_rate on every traded notional
+    Pass z_scores from calculate_pair_zscores to reuse them across thresholds
+    Returns a dict of per-pair arrays plus the (time, pair) net PnL per bar
+    """
+
+    if z_scores is None:
+        series_1, series_2, z_scores = calculate_pair_zscores(
+            prices, base_columns, quote_columns, hedge_window, zscore_window
+        )
+    else:
+        prices = np.asarray(prices, dtype=float)
+        series_1 = prices[:, base_columns]
+        series_2 = prices[:, quote_columns]
+
+    side = calculate_pair_positions(z_scores, zscore_thresh)
+    previous_side = np.zeros(side.shape, dtype=np.int8)
+    previous_side[1:] = side[:-1]
+
+    # Quantities fixed at the entry candle
+    is_entry = (side != 0) & (side != previous_side)
+    entry_row = last_index_where(is_entry, 0)
+    quantity_1 = position_size / np.take_along_axis(series_1, entry_row, axis=0)
+    quantity_2 = position_size / np.take_along_axis(series_2, entry_row, axis=0)
+
+    # Mark to market - long spread is long base and short quote
+    gross_pnl = np.zeros(side.shape)
+    gross_pnl[1:] = side[:-1] * (
+        quantity_1[:-1] * np.diff(series_1, axis=0)
+        - quantity_2[:-1] * np.diff(series_2, axis=0)
+    )
+
+    # Traded notional when closing and opening both legs
+    is_exit = (previous_side != 0) & (side != previous_side)
+    turnover = np.zeros(side.shape)
+    turnover[1:] = is_exit[1:] * (
+        quantity_1[:-1] * series_1[1:] + quantity_2[:-1] * series_2[1:]
+    )
+    turnover += is_entry * 2 * position_size
+
+    costs = turnover * (fee_rate + slippage_rate)
+    net_pnl = np.nan_to_num(gross_pnl - costs)
+
+    return {
+        "gross_pnl": np.nansum(gross_pnl, axis=0),
+        "costs": costs.sum(axis=0),
+        "net_pnl": net_pnl.sum(axis=0),
+        "turnover": turnover.sum(axis=0),
+        "trades": is_entry.sum(axis=0),
+        "bars_in_trade": (side != 0).sum(axis=0),
+        "open_at_end": side[-1] != 0,
+        "pnl_by_bar": net_pnl,
+    }
+
+
+# Backtest the saved cointegrated pairs on the saved price matrix
+def backtest_cointegrated_pairs(**kwargs):
+    from func_price_cache import load_market_prices
+
+    coint_pairs_df = pd.read_csv("cointegrated_pairs.csv")
+    df_market_prices = load_market_prices()
+    positions = {market: i for i, market in enumerate(df_market_prices.columns)}
+
+    result = backtest_pairs(
+        df_market_prices.values,
+        [positions[m] for m in coint_pairs_df["base_market"]],
+        [positions[m] for m in coint_pairs_df["quote_market"]],
+        **kwargs,
+    )
+
+    # Per pair summary
+    results_df = coint_pairs_df[["base_market", "quote_market"]].copy()
+    for column in (
+        "gross_pnl",
+        "costs",
+        "net_pnl",
+        "turnover",
+        "trades",
+        "bars_in_trade",
+        "open_at_end",
+    ):
+        results_df[column] = result[column]
+
+    return results_df.sort_values("net_pnl", ascending=False)
+
+
+# Write per pair results and print totals
+# Usage: python func_backtest.py [zscore_thresh]
+if __name__ == "__main__":
+    kwargs = {}
+    if len(sys.argv) > 1:
+        kwargs["zscore_thresh"] = float(sys.argv[1])
+
+    start = time.perf_counter()
+    results_df = backtest_cointegrated_pairs(**kwargs)
+    elapsed = time.perf_counter() - start
+
+    results_df.to_csv(BACKTEST_RESULTS_FILE, index=False)
+    print(
+        json.dumps(
+            {
+                "pairs": len(results_df),
+                "net_pnl": float(results_df["net_pnl"].sum()),
+                "turnover": float(results_df["turnover"].sum()),
+                "trades": int(results_df["trades"].sum()),
+                "seconds": elapsed,
+            }
+        )
+    )
@@ -1,4 +1,11 @@
-from func_private import place_market_order, check_order_status
+from constants import SIMULTANEOUS_LEGS
+from func_private import (
+    place_market_order,
+    prepare_market_order,
+    submit_market_order,
+    wait_for_order_status,
+)
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from func_messaging import send_message
 import time
@@ -30,6 +37,7 @@ class BotAgent:
         z_score,
         half_life,
         hedge_ratio,
+        accept_failsafe_quote_price,
     ):
         # Initialize class variables
         self.client = client
@@ -42,6 +50,7 @@ class BotAgent:
         self.quote_size = quote_size
         self.quote_price = quote_price
         self.accept_failsafe_base_price = accept_failsafe_base_price
+        self.accept_failsafe_quote_price = accept_failsafe_quote_price
         self.spread = spread
         self.z_score = z_score
         self.half_life = half_life
@@ -70,11 +79,8 @@ class BotAgent:
 
     # Check order status by id
     def check_order_status_by_id(self, order_id):
-        # Allow time to process
-        time.sleep(2)
-
-        # Check order status
-        order_status = check_order_status(self.client, order_id)
+        # Wait until filled, cancelled or timed out
+        order_status = wait_for_order_status(self.client, order_id)
 
         # Guard: If order cancelled move onto next Pair
         if order_status == "CANCELED":
@@ -82,29 +88,26 @@ class BotAgent:
             self.order_dict["pair_status"] = "FAILED"
             return "failed"
 
-        # Guard: If order not filled wait until order expiration
-        if order_status != "FAILED":
-            time.sleep(15)
-            order_status = check_order_status(self.client, order_id)
-
-            # Guard: If order cancelled move onto next Pair
-            if order_status == "CANCELED":
-                print(f"{self.market_1} vs {self.market_2} - Order cancelled...")
-                self.order_dict["pair_status"] = "FAILED"
-                return "failed"
-
-            # Guard: If not filled, cancel order
-            if order_status != "FILLED":
+        # Guard: If not filled, cancel order
+        if order_status != "FILLED":
+            try:
                 self.client.private.cancel_order(order_id=order_id)
-                self.order_dict["pair_status"] = "ERROR"
-                print(f"{self.market_1} vs {self.market_2} - Order error...")
-                return "error"
+            except Exception as e:
+                print(f"Cancel failed for order {order_id}: {e}")
+
+            self.order_dict["pair_status"] = "ERROR"
+            print(f"{self.market_1} vs {self.market_2} - Order error...")
+            return "error"
 
         # Return live
         return "live"
 
     # Open trades
     def open_trades(self):
+        # Submit both legs together if configured
+        if SIMULTANEOUS_LEGS:
+            return self.open_trades_simultaneous()
+
         # Print status
         print("---")
         print(f"{self.market_1}: Placing first order...")
@@ -166,6 +169,14 @@ class BotAgent:
         except Exception as e:
             self.order_dict["pair_status"] = "ERROR"
             self.order_dict["comments"] = f"Market 2 {self.market_2}: , {e}"
+
+            # Close order 1:
+            self.close_filled_leg(
+                self.market_1,
+                self.quote_side,
+                self.base_size,
+                self.accept_failsafe_base_price,
+            )
             return self.order_dict
 
         # Ensure order is live before processing
@@ -177,48 +188,200 @@ class BotAgent:
             self.order_dict["comments"] = f"{self.market_1} failed to fill"
 
             # Close order 1:
-            try:
-                close_order = place_market_order(
-                    self.client,
-                    market=self.market_1,
-                    side=self.quote_side,
-                    size=self.base_size,
-                    price=self.accept_failsafe_base_price,
-                    reduce_only=True,
-                )
+            self.close_filled_leg(
+                self.market_1,
+                self.quote_side,
+                self.base_size,
+                self.accept_failsafe_base_price,
+            )
+            return self.order_dict
+
+        # Return success result
+        else:
+            self.order_dict["pair_status"] = "LIVE"
+            return self.order_dict
 
-                # Ensure order is live before proceeding
-                time.sleep(2)
+    # Close a filled leg when the other leg failed
+    def close_filled_leg(self, market, side, size, price):
+        try:
+            close_order = place_market_order(
+                self.client,
+                market=market,
+                side=side,
+                size=size,
+                price=price,
+                reduce_only=True,
+            )
 
-                order_status_close_order = check_order_status(
-                    self.client, close_order["order"]["id"]
-                )
+            # Ensure order is live before proceeding
+            order_status_close_order = wait_for_order_status(
+                self.client, close_order["order"]["id"]
+            )
 
-                if order_status_close_order != "FILLED":
-                    print("ABORT PROGRAM")
-                    print("Unexpected Error")
-                    print(order_status_close_order)
+        except Exception as e:
+            self.order_dict["pair_status"] = "ERROR"
+            self.order_dict["comments"] = f"Close Market {market}: , {e}"
+            print("ABORT PROGRAM")
+            print("Unexpected Error")
+            print(e)
 
-                    # Send Message
-                    send_message("Failed to execute. Code red. Error code: 100")
+            # Send Message
+            send_message("Failed to execute. Code red. Error code: 101")
 
-                    # ABORT
-                    exit(1)
+            # ABORT
+            exit(1)
 
-            except Exception as e:
-                self.order_dict["pair_status"] = "ERROR"
-                self.order_dict["comments"] = f"Close Market 1 {self.market_1}: , {e}"
-                print("ABORT PROGRAM")
-                print("Unexpected Error")
-                print(order_status_close_order)
+        if order_status_close_order != "FILLED":
+            print("ABORT PROGRAM")
+            print("Unexpected Error")
+            print(order_status_close_order)
+
+            # Send Message
+            send_message("Failed to execute. Code red. Error code: 100")
+
+            # ABORT
+            exit(1)
+
+    # Open both legs at the same time
+    def open_trades_simultaneous(self):
+        """
+        Sign both orders up front, submit them concurrently and confirm together
+        If only one leg fills it is closed at its failsafe price
+        """
+
+        # Print status
+        print("---")
+        print(f"{self.market_1} and {self.market_2}: Placing both orders...")
+        print(
+            f"Side: {self.base_side}, Size: {self.base_size}, Price: {self.base_price}"
+        )
+        print(
+            f"Side: {self.quote_side}, Size: {self.quote_size}, Price: {self.quote_price}"
+        )
+        print("---")
+
+        # Prepare and sign both orders before sending either
+        try:
+            base_params = prepare_market_order(
+                self.client,
+                market=self.market_1,
+                side=self.base_side,
+                size=self.base_size,
+                price=self.base_price,
+                reduce_only=False,
+            )
+            quote_params = prepare_market_order(
+                self.client,
+                market=self.market_2,
+                side=self.quote_side,
+                size=self.quote_size,
+                price=self.quote_price,
+                reduce_only=False,
+            )
+        except Exception as e:
+            self.order_dict["pair_status"] = "ERROR"
+            self.order_dict["comments"] = f"Prepare orders: , {e}"
+            return self.order_dict
 
-                # Send Message
-                send_message("Failed to execute. Code red. Error code: 101")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Submit both legs
+            base_future = executor.submit(submit_market_order, self.client, base_params)
+            quote_future = executor.submit(
+                submit_market_order, self.client, quote_params
+            )
+
+            comments = []
+            order_status_futures = {}
+            for leg, market, future in (
+                ("m1", self.market_1, base_future),
+                ("m2", self.market_2, quote_future),
+            ):
+                try:
+                    order = future.result()
+
+                    # Store the order id
+                    self.order_dict[f"order_id_{leg}"] = order["order"]["id"]
+                    self.order_dict[f"order_time_{leg}"] = datetime.utcnow().isoformat()
+                except Exception as e:
+                    comments.append(f"Market {leg[-1]} {market}: , {e}")
+                    continue
+
+                # Confirm fills in parallel
+                order_status_futures[leg] = executor.submit(
+                    self.check_order_status_by_id, order["order"]["id"]
+                )
 
-                # ABORT
-                exit(1)
+            is_live = {}
+            for leg in ("m1", "m2"):
+                future = order_status_futures.get(leg)
+                is_live[leg] = future is not None and future.result() == "live"
 
         # Return success result
-        else:
+        if is_live["m1"] and is_live["m2"]:
             self.order_dict["pair_status"] = "LIVE"
             return self.order_dict
+
+        self.order_dict["pair_status"] = "ERROR"
+        for leg, market in (("m1", self.market_1), ("m2", self.market_2)):
+            if leg in order_status_futures and not is_live[leg]:
+                comments.append(f"{market} failed to fill")
+        self.order_dict["comments"] = "; ".join(comments)
+
+        # Unwind a single filled leg
+        if is_live["m1"]:
+            self.close_filled_leg(
+                self.market_1,
+                self.quote_side,
+                self.base_size,
+                self.accept_failsafe_base_price,
+            )
+        elif is_live["m2"]:
+            self.close_filled_leg(
+                self.market_2,
+                self.base_side,
+                self.quote_size,
+                self.accept_failsafe_quote_price,
+            )
+
+        return self.order_dict
+
+
+if __name__ == "__main__":
+    import func_bot_agent
+
+    # Stub order placement: base leg fills, quote leg placement raises
+    placed = []
+
+    def stub_place_market_order(client, market, side, size, price, reduce_only):
+        placed.append((market, side, size, price, reduce_only))
+        if market == "ETH-USD" and not reduce_only:
+            raise ConnectionError("quote leg rejected")
+        return {"order": {"id": f"order-{len(placed)}"}}
+
+    func_bot_agent.place_market_order = stub_place_market_order
+    func_bot_agent.wait_for_order_status = lambda client, order_id: "FILLED"
+    func_bot_agent.SIMULTANEOUS_LEGS = False
+
+    bot_agent = func_bot_agent.BotAgent(
+        None,
+        market_1="BTC-USD",
+        market_2="ETH-USD",
+        base_side="BUY",
+        base_size="0.01",
+        base_price="30000",
+        quote_side="SELL",
+        quote_size="0.2",
+        quote_price="2000",
+        accept_failsafe_base_price="29000",
+        spread=0.5,
+        z_score=-2.1,
+        half_life=12,
+        hedge_ratio=1.3,
+        accept_failsafe_quote_price="2100",
+    )
+    order_dict = bot_agent.open_trades()
+
+    # Base leg must be unwound with a reduce-only order
+    print(placed)
+    assert order_dict["pair_status"] == "ERROR"
+    assert placed[-1] == ("BTC-USD", "SELL", "0.01", "29000", True)
@@ -0,0 +1,140 @@
+from constants import RESOLUTION, CANDLE_STORE_DIR
+from func_utils import parse_time
+import threading
+import json
+import csv
+import os
+
+
+# Truncate the last line of a file
+def remove_last_line(path):
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+
+        # Read back far enough to find the line break before the last line
+        chunk_size = 256
+        while True:
+            start = max(0, size - chunk_size)
+            f.seek(start)
+            tail = f.read(size - start).rstrip(b"\r\n")
+            line_break = tail.rfind(b"\n")
+            if line_break >= 0 or start == 0:
+                break
+            chunk_size *= 2
+
+        f.truncate(start + line_break + 1)
+
+
+# Share of duplicate rows in a market file that triggers a rewrite on load
+CANDLE_STORE_COMPACT_SHARE = 0.1
+
+
+# Class: Append-only local candle store
+class CandleStore:
+
+    """
+    Keeps close prices on disk keyed by (market, resolution, startedAt)
+    Records the last startedAt held per market so only the tail needs fetching
+    The last row may still be forming and is rewritten in place when re-fetched
+    """
+
+    # Initialize class
+    def __init__(self, root=CANDLE_STORE_DIR, resolution=RESOLUTION):
+        self.root = root
+        self.resolution = resolution
+        self.directory = os.path.join(root, resolution)
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.lock = threading.Lock()
+
+        # Load index of last timestamps per market
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    # File holding candles for a market
+    def market_path(self, market):
+        return os.path.join(self.directory, f"{market}.csv")
+
+    # Last startedAt stored for a market as a datetime
+    def last_timestamp(self, market):
+        last_started_at = self.index.get(market)
+        if last_started_at is None or not os.path.exists(self.market_path(market)):
+            return None
+        return parse_time(last_started_at)
+
+    # Append candles for a market
+    def append(self, market, close_prices):
+        """
+        Accepts rows as returned by get_candles_range in any order
+        Rows at or after the last stored candle are appended
+        A re-fetched last candle replaces the stored last row
+        """
+
+        last_started_at = self.index.get(market)
+        rows = []
+        for row in close_prices:
+            if last_started_at is None or row["datetime"] >= last_started_at:
+                rows.append((row["datetime"], row[market]))
+
+        if len(rows) == 0:
+            return 0
+
+        rows.sort()
+
+        # Drop the provisional last row if it was fetched again
+        path = self.market_path(market)
+        if rows[0][0] == last_started_at and os.path.exists(path):
+            remove_last_line(path)
+
+        # Append to market file
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows(rows)
+
+        with self.lock:
+            self.index[market] = rows[-1][0]
+
+        return len(rows)
+
+    # Load candles for a market, oldest first
+    def load(self, market, from_iso=None):
+        closes = {}
+        n_rows = 0
+        try:
+            with open(self.market_path(market), newline="") as f:
+                for started_at, close in csv.reader(f):
+                    closes[started_at] = close
+                    n_rows += 1
+        except OSError:
+            return []
+
+        # Compact files grown with duplicate rows
+        if n_rows - len(closes) > len(closes) * CANDLE_STORE_COMPACT_SHARE:
+            self.rewrite(market, closes)
+
+        close_prices = []
+        for started_at in sorted(closes.keys()):
+            if from_iso is not None and started_at < from_iso:
+                continue
+            close_prices.append({"datetime": started_at, market: closes[started_at]})
+
+        return close_prices
+
+    # Rewrite a market file with one row per candle
+    def rewrite(self, market, closes):
+        path = self.market_path(market)
+        with open(path + ".tmp", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows(sorted(closes.items()))
+        os.replace(path + ".tmp", path)
+
+    # Persist index of last timestamps
+    def save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            with open(self.index_path, "w") as f:
+                json.dump(self.index, f)
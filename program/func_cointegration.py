@@ -1,9 +1,19 @@
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
-from statsmodels.regression.rolling import RollingOLS
-from statsmodels.tsa.stattools import adfuller, coint
-from constants import ZSCORE_THRESH
+import tempfile
+import os
+from constants import (
+    ZSCORE_THRESH,
+    HEDGE_RATIO_WINDOW,
+    ZSCORE_WINDOW,
+    COINT_SCREEN,
+    COINT_SCREEN_LAGS,
+    COINT_SCREEN_TSTAT,
+    COINT_SCREEN_MEMORY_MB,
+    COINT_WORKERS,
+    MAX_HALF_LIFE,
+)
+from concurrent.futures import ProcessPoolExecutor
 
 # Calculate Half Life
 # https://www.pythonforfinance.net/2016/05/09/python-backtesting-mean-reversion-part-2/
@@ -13,13 +23,17 @@ pd.set_option("mode.chained_assignment", None)
 
 
 def calculate_half_life(spread):
+    # Import on use, statsmodels is slow to load and only the scan needs it
+    from statsmodels.regression.linear_model import OLS
+    from statsmodels.tools.tools import add_constant
+
     df_spread = pd.DataFrame(spread, columns=["spread"])
     spread_lag = df_spread.spread.shift(1)
     spread_lag.iloc[0] = spread_lag.iloc[1]
     spread_ret = df_spread.spread - spread_lag
     spread_ret.iloc[0] = spread_ret.iloc[1]
-    spread_lag2 = sm.add_constant(spread_lag)
-    model = sm.OLS(spread_ret, spread_lag2)
+    spread_lag2 = add_constant(spread_lag)
+    model = OLS(spread_ret, spread_lag2)
     res = model.fit()
     halflife = round(-np.log(2) / res.params[1], 0)
 
@@ -27,6 +41,8 @@ def calculate_half_life(spread):
 
 
 def test_for_stationarity(spread):
+    from statsmodels.tsa.stattools import adfuller
+
     is_stationary = False
 
     # Perform Dickey-Fuller test
@@ -56,6 +72,8 @@ def calculate_zscore(spread, window):
 
 # Calculate Cointegration
 def calculate_cointegration(series_1, series_2):
+    from statsmodels.tsa.stattools import coint
+
     series_1 = np.array(series_1).astype(np.float)
     series_2 = np.array(series_2).astype(np.float)
 
@@ -70,84 +88,380 @@ def calculate_cointegration(series_1, series_2):
     return coint_flag
 
 
+# Calculate rolling hedge ratio
+def calculate_rolling_hedge_ratio(series_1, series_2, window):
+    """
+    Rolling least squares slope of series_1 on series_2 without constant
+    Matches RollingOLS(series_1, series_2) using cumulative sums of x*x and x*y
+    Accepts 1d series or 2d arrays with one pair per column, O(n) in both cases
+    """
+
+    y = np.asarray(series_1, dtype=float)
+    x = np.asarray(series_2, dtype=float)
+
+    # Cumulative sums with a leading zero row
+    zeros = np.zeros((1,) + x.shape[1:])
+    sum_xy = np.concatenate([zeros, np.cumsum(x * y, axis=0)])
+    sum_xx = np.concatenate([zeros, np.cumsum(x * x, axis=0)])
+
+    # Window sums and slope, undefined until the first full window
+    hedge_ratio = np.full(x.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hedge_ratio[window - 1 :] = (sum_xy[window:] - sum_xy[:-window]) / (
+            sum_xx[window:] - sum_xx[:-window]
+        )
+
+    return hedge_ratio
+
+
 # Calculate hedge ratio and spread
-def calculate_hedge_ratio_and_spread(coint_pair_df, base_market, quote_market):
+def calculate_hedge_ratio_and_spread(
+    coint_pair_df, base_market, quote_market, window=HEDGE_RATIO_WINDOW
+):
     df = coint_pair_df.copy()
+    series_1 = df[base_market].values.astype(float)
+    series_2 = df[quote_market].values.astype(float)
 
     # Calculate hedge ratio
-    df["hedge_ratio"] = (
-        RollingOLS(
-            df[base_market].astype(float),
-            df[quote_market].astype(float),
-            window=168,
-        )
-        .fit()
-        .params.values
-    )
+    df["hedge_ratio"] = calculate_rolling_hedge_ratio(series_1, series_2, window)
 
     # Calculate spread
-    df["spread"] = (
-        df[base_market].astype(float)
-        - df[quote_market].astype(float) * df["hedge_ratio"]
-    )
+    df["spread"] = series_1 - series_2 * df["hedge_ratio"].values
 
     # Return only hedge_ration and spread columns
     return df[["hedge_ratio", "spread"]]
 
 
-# Store Cointegration Results
-def store_cointegration_results(df_market_prices):
-    # Initialize
-    markets = df_market_prices.columns.to_list()
-    criteria_met_pairs = []
+# Calculate rolling ZScore for many series at once
+def calculate_rolling_zscores(spreads, window):
+    """
+    Matches calculate_zscore column by column using cumulative sums
+    Windows that include a NaN spread give NaN, like pandas rolling
+    """
+
+    spreads = np.asarray(spreads, dtype=float)
+    valid = ~np.isnan(spreads)
+
+    # Shift by the column mean to keep the variance accurate
+    count = valid.sum(axis=0)
+    shift = np.where(valid, spreads, 0.0).sum(axis=0) / np.maximum(count, 1)
+    centered = np.where(valid, spreads - shift, 0.0)
+
+    # Cumulative sums with a leading zero row
+    zeros = np.zeros((1,) + spreads.shape[1:])
+    sum_s = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+    sum_sq = np.concatenate([zeros, np.cumsum(centered * centered, axis=0)])
+    sum_valid = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+
+    # Window mean and sample variance
+    window_sum = sum_s[window:] - sum_s[:-window]
+    window_sq = sum_sq[window:] - sum_sq[:-window]
+    window_valid = sum_valid[window:] - sum_valid[:-window]
+    mean = window_sum / window
+    variance = (window_sq - window_sum * mean) / (window - 1)
+
+    zscores = np.full(spreads.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zscores[window - 1 :] = np.where(
+            window_valid == window,
+            (centered[window - 1 :] - mean) / np.sqrt(variance),
+            np.nan,
+        )
 
-    # Find cointegrated pairs
-    # Start with our base pair
-    for index, base_market in enumerate(markets[:-1]):
-        series_1 = df_market_prices[base_market].values.astype(float).tolist()
+    return zscores
+
+
+# Latest signal per pair from scan_pair_zscores
+PAIR_SIGNAL_DTYPE = np.dtype(
+    [
+        ("pair", np.int64),
+        ("z_score", np.float64),
+        ("spread", np.float64),
+        ("hedge_ratio", np.float64),
+    ]
+)
+
+
+# Scan latest ZScore for many pairs at once
+def scan_pair_zscores(
+    prices,
+    base_columns,
+    quote_columns,
+    hedge_window=HEDGE_RATIO_WINDOW,
+    zscore_window=ZSCORE_WINDOW,
+    zscore_thresh=ZSCORE_THRESH,
+):
+    """
+    prices is a (time, market) matrix, base_columns and quote_columns index into it
+    Computes latest hedge ratio, spread and ZScore for every pair in one pass
+    Returns PAIR_SIGNAL_DTYPE rows with abs(z_score) >= zscore_thresh by abs(z_score)
+    """
+
+    # Only the last hedge + ZScore windows affect the latest ZScore
+    n_rows = hedge_window + zscore_window - 1
+    recent = np.asarray(prices[-n_rows:], dtype=float)
+    series_1 = recent[:, base_columns]
+    series_2 = recent[:, quote_columns]
+
+    # Hedge ratio and spread for every pair
+    hedge_ratio = calculate_rolling_hedge_ratio(series_1, series_2, hedge_window)
+    spread = series_1 - series_2 * hedge_ratio
+    z_score = calculate_rolling_zscores(spread, zscore_window)[-1]
+
+    # Keep pairs past the threshold, largest first
+    with np.errstate(invalid="ignore"):
+        is_signal = np.abs(z_score) >= zscore_thresh
+    pairs = np.flatnonzero(is_signal)
+    pairs = pairs[np.argsort(-np.abs(z_score[pairs]), kind="stable")]
+
+    signals = np.zeros(len(pairs), dtype=PAIR_SIGNAL_DTYPE)
+    signals["pair"] = pairs
+    signals["z_score"] = z_score[pairs]
+    signals["spread"] = spread[-1, pairs]
+    signals["hedge_ratio"] = hedge_ratio[-1, pairs]
+
+    return signals
+
+
+# Calculate fixed-lag Dickey-Fuller t-statistics for many series at once
+def calculate_adf_tstats(residuals, lags):
+    """
+    Regress diff(e) on lagged e and lags of diff(e) without constant
+    Each column of residuals is one series, returns one t-statistic per column
+    Series with singular or non-finite normal equations get NaN
+    """
+
+    diffs = np.diff(residuals, axis=0)
+    n_obs = diffs.shape[0] - lags
+
+    # Build regressors (n_obs, n_series, 1 + lags)
+    regressors = [residuals[lags:-1]]
+    for lag in range(1, lags + 1):
+        regressors.append(diffs[lags - lag : diffs.shape[0] - lag])
+    x = np.stack(regressors, axis=-1)
+    y = diffs[lags:]
+
+    # Solve all normal equations together
+    xtx = np.einsum("tpi,tpj->pij", x, x)
+    xty = np.einsum("tpi,tp->pi", x, y)
+
+    # Swap singular systems for the identity so one bad pair cannot fail the batch
+    singular = ~np.isfinite(xtx).all(axis=(1, 2))
+    xtx[singular] = np.eye(xtx.shape[-1])
+    singular |= np.linalg.matrix_rank(xtx) < xtx.shape[-1]
+    xtx[singular] = np.eye(xtx.shape[-1])
+    xtx_inv = np.linalg.inv(xtx)
+    coefs = np.einsum("pij,pj->pi", xtx_inv, xty)
+
+    # Standard error of the lagged level coefficient
+    fitted = np.einsum("tpi,pi->tp", x, coefs)
+    sigma2 = ((y - fitted) ** 2).sum(axis=0) / (n_obs - x.shape[-1])
+    std_err = np.sqrt(sigma2 * xtx_inv[:, 0, 0])
+
+    t_stats = coefs[:, 0] / std_err
+    t_stats[singular] = np.nan
+    return t_stats
+
+
+# Screen all pairs for cointegration candidates
+def screen_cointegration_candidates(prices, memory_mb=COINT_SCREEN_MEMORY_MB):
+    """
+    Batched Engle-Granger pre-filter over every pair of columns in prices
+    First stage OLS residuals come from the shared covariance matrix
+    Pairs whose fixed-lag ADF t-stat is below COINT_SCREEN_TSTAT are returned
+    Pairs per batch are sized so the float64 working arrays fit in memory_mb
+    """
+
+    # Precompute means, variances and covariances
+    centered = prices - prices.mean(axis=0)
+    covariance = centered.T @ centered
+    variances = np.diag(covariance)
+
+    # Pairs in the same order as the nested market loop
+    base_indexes, quote_indexes = np.triu_indices(prices.shape[1], k=1)
+
+    # Residuals, diffs, targets and one regressor per lag are each rows x pairs
+    bytes_per_pair = 8 * prices.shape[0] * (COINT_SCREEN_LAGS + 3)
+    chunk_size = max(1, int(memory_mb * 1024 * 1024) // bytes_per_pair)
+
+    candidates = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, len(base_indexes), chunk_size):
+            base_chunk = base_indexes[start : start + chunk_size]
+            quote_chunk = quote_indexes[start : start + chunk_size]
+
+            # Residuals of base regressed on quote with constant
+            betas = covariance[base_chunk, quote_chunk] / variances[quote_chunk]
+            residuals = centered[:, base_chunk] - centered[:, quote_chunk] * betas
+
+            # Keep pairs that look stationary
+            t_stats = calculate_adf_tstats(residuals, COINT_SCREEN_LAGS)
+            keep = t_stats < COINT_SCREEN_TSTAT
+            candidates.extend(
+                zip(base_chunk[keep].tolist(), quote_chunk[keep].tolist())
+            )
 
-        # Get Quote Pair
-        for quote_market in markets[index + 1 :]:
-            series_2 = df_market_prices[quote_market].values.astype(float).tolist()
+    return candidates
 
-            # Check criteria
-            coint_flag = calculate_cointegration(series_1, series_2)
 
-            if coint_flag != 1:
-                continue
+# Test a single pair against all criteria
+def evaluate_pair(
+    series_1, series_2, base_market, quote_market, max_half_life=MAX_HALF_LIFE
+):
+    # Check criteria
+    coint_flag = calculate_cointegration(series_1, series_2)
 
-            coint_pair_df = df_market_prices.loc[:, [base_market, quote_market]]
+    if coint_flag != 1:
+        return None
 
-            # Calculate hedge ratio and spread
-            hedge_ratio_and_spread_df = calculate_hedge_ratio_and_spread(
-                coint_pair_df, base_market, quote_market
-            )
+    coint_pair_df = pd.DataFrame({base_market: series_1, quote_market: series_2})
+
+    # Calculate hedge ratio and spread
+    hedge_ratio_and_spread_df = calculate_hedge_ratio_and_spread(
+        coint_pair_df, base_market, quote_market
+    )
+
+    # Calculate hedge ratio
+    coint_pair_df["hedge_ratio"] = hedge_ratio_and_spread_df["hedge_ratio"]
+    coint_pair_df["spread"] = hedge_ratio_and_spread_df["spread"]
+
+    # Stationary test
+    coint_pair_df = coint_pair_df.dropna()
+    stationary_flag = test_for_stationarity(coint_pair_df["spread"])
+
+    if not stationary_flag:
+        return None
 
-            # Calculate hedge ratio
-            coint_pair_df["hedge_ratio"] = hedge_ratio_and_spread_df["hedge_ratio"]
-            coint_pair_df["spread"] = hedge_ratio_and_spread_df["spread"]
+    # Calculate halflife
+    half_life = calculate_half_life(coint_pair_df["spread"])
 
-            # Stationary test
-            coint_pair_df = coint_pair_df.dropna()
-            stationary_flag = test_for_stationarity(coint_pair_df["spread"])
+    if half_life < 0 or half_life > max_half_life:
+        return None
 
-            if not stationary_flag:
-                continue
+    return {
+        "base_market": base_market,
+        "quote_market": quote_market,
+        "half_life": half_life,
+    }
 
-            # Calculate halflife
-            half_life = calculate_half_life(coint_pair_df["spread"])
 
-            if half_life < 0 or half_life > 24:
-                continue
+# Price matrix memory-mapped by each scan worker
+_worker_prices = None
 
-            # Log pair
-            criteria_met_pairs.append(
-                {
-                    "base_market": base_market,
-                    "quote_market": quote_market,
-                    "half_life": half_life,
-                }
+
+# Attach worker to the shared price matrix
+def _init_scan_worker(prices_path):
+    global _worker_prices
+    _worker_prices = np.load(prices_path, mmap_mode="r")
+
+
+# Evaluate a chunk of pairs inside a worker
+def _scan_pair_chunk(markets, pairs, max_half_life):
+    results = []
+    for base_index, quote_index in pairs:
+        result = evaluate_pair(
+            _worker_prices[:, base_index],
+            _worker_prices[:, quote_index],
+            markets[base_index],
+            markets[quote_index],
+            max_half_life,
+        )
+        if result is not None:
+            results.append(result)
+
+    return results
+
+
+# Evaluate pairs across a process pool
+def scan_pairs_parallel(
+    prices, markets, candidates, workers, max_half_life=MAX_HALF_LIFE
+):
+    """
+    Workers memory-map one copy of the price matrix instead of receiving it
+    Chunks are merged back in candidate order so results match the serial scan
+    """
+
+    chunk_size = max(1, -(-len(candidates) // (workers * 4)))
+    chunks = [
+        candidates[i : i + chunk_size] for i in range(0, len(candidates), chunk_size)
+    ]
+
+    criteria_met_pairs = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Column-major so each market is contiguous on disk
+        prices_path = os.path.join(tmp_dir, "prices.npy")
+        np.save(prices_path, np.asfortranarray(prices))
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_scan_worker,
+            initargs=(prices_path,),
+        ) as executor:
+            for results in executor.map(
+                _scan_pair_chunk,
+                [markets] * len(chunks),
+                chunks,
+                [max_half_life] * len(chunks),
+            ):
+                criteria_met_pairs.extend(results)
+
+    return criteria_met_pairs
+
+
+# Find pairs meeting all criteria
+def select_cointegrated_pairs(
+    prices,
+    markets,
+    max_half_life=MAX_HALF_LIFE,
+    workers=COINT_WORKERS,
+    screen=COINT_SCREEN,
+):
+    """
+    prices is a (time, market) array with columns named by markets
+    Returns a dict per pair with base_market, quote_market and half_life
+    """
+
+    criteria_met_pairs = []
+
+    # Screen pairs in one batch, only survivors get the full test
+    if screen:
+        candidates = screen_cointegration_candidates(prices)
+    else:
+        base_indexes, quote_indexes = np.triu_indices(len(markets), k=1)
+        candidates = list(zip(base_indexes.tolist(), quote_indexes.tolist()))
+
+    total_pairs = len(markets) * (len(markets) - 1) // 2
+    print(f"Testing {len(candidates)} of {total_pairs} pairs for cointegration")
+
+    # Find cointegrated pairs
+    workers = workers if workers > 0 else os.cpu_count()
+    if workers > 1 and len(candidates) > 0:
+        criteria_met_pairs = scan_pairs_parallel(
+            prices, markets, candidates, workers, max_half_life
+        )
+    else:
+        for base_index, quote_index in candidates:
+            result = evaluate_pair(
+                prices[:, base_index],
+                prices[:, quote_index],
+                markets[base_index],
+                markets[quote_index],
+                max_half_life,
             )
+            if result is not None:
+                criteria_met_pairs.append(result)
+
+    return criteria_met_pairs
+
+
+# Store Cointegration Results
+def store_cointegration_results(df_market_prices):
+    # Initialize
+    markets = df_market_prices.columns.to_list()
+    prices = df_market_prices.values.astype(float)
+
+    # Find cointegrated pairs
+    criteria_met_pairs = select_cointegrated_pairs(prices, markets)
 
     # Create and save DataFrame
     df_criteria_met = pd.DataFrame(criteria_met_pairs)
@@ -159,3 +473,24 @@ def store_cointegration_results(df_market_prices):
     # Return result
     print("Cointegrated pairs successfully saved")
     return "saved"
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n_rows, n_walks = 1000, 12
+
+    # Independent random walks plus mean-reverting partners for a few of them
+    walks = 100 + rng.normal(0, 1, (n_rows, n_walks)).cumsum(axis=0)
+    partners = []
+    for column in range(4):
+        noise = np.zeros(n_rows)
+        for t in range(1, n_rows):
+            noise[t] = 0.8 * noise[t - 1] + rng.normal(0, 1)
+        partners.append(walks[:, column] * (1 + 0.2 * column) + noise)
+    prices = np.column_stack([walks] + partners)
+    markets = [f"M{i:02d}" for i in range(prices.shape[1])]
+
+    screened = select_cointegrated_pairs(prices, markets, workers=1, screen=True)
+    unscreened = select_cointegrated_pairs(prices, markets, workers=1, screen=False)
+    print(f"Screened {len(screened)} pairs, unscreened {len(unscreened)} pairs")
+    assert screened == unscreened
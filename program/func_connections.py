@@ -1,19 +1,50 @@
 from decouple import config
 from dydx3 import Client
-from web3 import Web3
+from dydx3.helpers import requests as dydx_requests
+from requests.adapters import HTTPAdapter
+from func_private import prime_order_context
+from func_metrics import record_response
 from constants import (
+  API_POOL_SIZE,
+  CANDLE_FETCH_WORKERS,
   HOST,
   ETHEREUM_ADDRESS,
   DYDX_API_KEY,
   DYDX_API_SECRET,
   DYDX_API_PASSPHRASE,
   STARK_PRIVATE_KEY,
-  HTTP_PROVIDER,
+  NETWORK_ID,
 )
 
+# Configure the shared session used by every dydx3 request
+def configure_api_session(pool_size=API_POOL_SIZE):
+
+  # Guard: Only configure once per process
+  session = dydx_requests.session
+  if record_response in session.hooks["response"]:
+    return session
+
+  # Keep enough keep-alive connections open for concurrent fetches
+  adapter = HTTPAdapter(
+      pool_connections=4,
+      pool_maxsize=max(pool_size, CANDLE_FETCH_WORKERS),
+      pool_block=True,
+  )
+  session.mount("https://", adapter)
+  session.mount("http://", adapter)
+
+  # Record latency per endpoint
+  session.hooks["response"].append(record_response)
+
+  return session
+
+
 # Connect to DYDX
 def connect_dydx():
 
+  # Reuse pooled connections for all requests
+  configure_api_session()
+
   # Create Client Connection
   client = Client(
       host=HOST,
@@ -25,7 +56,8 @@ def connect_dydx():
       stark_private_key=STARK_PRIVATE_KEY,
       eth_private_key=config("ETH_PRIVATE_KEY"),
       default_ethereum_address=ETHEREUM_ADDRESS,
-      web3=Web3(Web3.HTTPProvider(HTTP_PROVIDER))
+      # Network id is known up front, a web3 provider would only look it up
+      network_id=NETWORK_ID,
   )
 
   # Confirm client
@@ -36,5 +68,8 @@ def connect_dydx():
   print("Account ID: ", account_id)
   print("Quote Balance: ", quote_balance)
 
+  # Cache position id and server clock for order placement
+  prime_order_context(client, account)
+
   # Return Client
   return client
@@ -0,0 +1,83 @@
+from constants import (
+    DAEMON_TICK_SECONDS,
+    DAEMON_TICK_OFFSET_SECONDS,
+    DAEMON_REFRESH_SECONDS,
+)
+from func_messaging import send_message
+import threading
+import signal
+import time
+
+# Set when SIGINT or SIGTERM is received
+STOP_EVENT = threading.Event()
+
+
+# Handle stop signal
+def handle_stop_signal(signum, frame):
+    # Second signal stops immediately
+    if STOP_EVENT.is_set():
+        raise KeyboardInterrupt
+
+    print(f"Received signal {signum}, stopping after current cycle...")
+    STOP_EVENT.set()
+
+
+# Seconds until the next candle-aligned tick
+def seconds_until_next_tick(
+    interval=DAEMON_TICK_SECONDS, offset=DAEMON_TICK_OFFSET_SECONDS
+):
+    now = time.time()
+    return interval - ((now - offset) % interval)
+
+
+# Run a refresh, reporting whether it succeeded
+def run_daemon_refresh(client, run_refresh):
+    # Failures leave the refresh due, trading continues on the current pairs
+    try:
+        if run_refresh(client) is not False:
+            return True
+        print("Refresh failed, retrying next tick")
+    except Exception as e:
+        print("Error in daemon refresh: ", e)
+        send_message(f"Error in daemon refresh {e}")
+
+    return False
+
+
+# Run cycles on a timer until stopped
+def run_daemon(client, run_cycle, run_refresh=None):
+    """
+    Keeps the client and in-memory caches alive between cycles
+    run_cycle runs every tick, aligned to candle boundaries plus an offset
+    run_refresh runs at start and then every DAEMON_REFRESH_SECONDS
+    A refresh that returns False or raises is retried on the next tick
+    """
+
+    # Stop gracefully on SIGINT (timeout -s 2) and SIGTERM
+    signal.signal(signal.SIGINT, handle_stop_signal)
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+
+    next_refresh = time.monotonic()
+
+    print("Daemon started")
+    while not STOP_EVENT.is_set():
+        try:
+            # Refresh cointegrated pairs on schedule
+            if run_refresh is not None and time.monotonic() >= next_refresh:
+                if run_daemon_refresh(client, run_refresh):
+                    next_refresh = time.monotonic() + DAEMON_REFRESH_SECONDS
+
+            # Guard: Skip trading if stopped during refresh
+            if STOP_EVENT.is_set():
+                break
+
+            run_cycle(client)
+
+        except Exception as e:
+            print("Error in daemon cycle: ", e)
+            send_message(f"Error in daemon cycle {e}")
+
+        # Sleep until next tick or until stopped
+        STOP_EVENT.wait(seconds_until_next_tick())
+
+    print("Daemon stopped")
@@ -1,9 +1,9 @@
-from constants import ZSCORE_THRESH, LEVERAGE
-from func_utils import format_number
-from func_public import get_candles_recent
-from func_cointegration import calculate_hedge_ratio_and_spread, calculate_zscore
-from func_private import is_open_positions
+from constants import LEVERAGE, HEDGE_RATIO_WINDOW, ZSCORE_WINDOW
+from func_markets import get_market_index
+from func_private import get_open_position_markets
 from func_bot_agent import BotAgent
+from func_price_cache import get_price_matrix
+from func_cointegration import scan_pair_zscores
 import pandas as pd
 import json
 
@@ -18,11 +18,11 @@ def open_positions(client):
     # Load cointegrated pairs
     coint_pairs_df = pd.read_csv("cointegrated_pairs.csv")
 
-    # Load market prices
-    market_prices_df = pd.read_csv("market_prices.csv", index_col="datetime")
+    # Load shared price matrix
+    price_matrix = get_price_matrix()
 
     # Get markets from referencing of min order size, tick size etc
-    markets = client.public.get_markets().data
+    market_index = get_market_index(client)
 
     # Initialize container for BotAgent results
     bot_agents = []
@@ -47,129 +47,130 @@ def open_positions(client):
 
     print(f"Balance: {free_collateral} and minimum at {min_collateral}")
 
+    # Snapshot open positions once, kept up to date as trades open
+    open_markets = get_open_position_markets(client)
+
+    # Score every pair in one pass, strongest signals first
+    base_columns = [price_matrix.positions[m] for m in coint_pairs_df["base_market"]]
+    quote_columns = [price_matrix.positions[m] for m in coint_pairs_df["quote_market"]]
+    signals = scan_pair_zscores(
+        price_matrix.recent_rows(HEDGE_RATIO_WINDOW + ZSCORE_WINDOW - 1),
+        base_columns,
+        quote_columns,
+    )
+
     # Find ZScore triggers
-    for index, row in coint_pairs_df.iterrows():
+    for signal in signals:
         # Extract variables
+        row = coint_pairs_df.iloc[signal["pair"]]
         base_market = row["base_market"]
         quote_market = row["quote_market"]
         half_life = row["half_life"]
-
-        # Get prices
-        pair_df = market_prices_df.loc[:, [base_market, quote_market]]
-
-        # Get hedge ratio and spread
-        spread_and_zscore_df = calculate_hedge_ratio_and_spread(
-            pair_df, base_market, quote_market
-        )
-
-        pair_df["hedge_ratio"] = spread_and_zscore_df["hedge_ratio"]
-        pair_df["spread"] = spread_and_zscore_df["spread"]
-
-        # Calculate ZScore
-        z_score = calculate_zscore(pair_df["spread"], 72).values.tolist()[-1]
-
-        # Establish if potential trade
-        if abs(z_score) >= ZSCORE_THRESH:
-            # Ensure like-for-like not already open (diversify trading)
-            is_base_open = is_open_positions(client, base_market)
-            is_quote_open = is_open_positions(client, quote_market)
-
-            # Place trade
-            if not is_base_open and not is_quote_open:
-                # Determine side
-                base_side = "BUY" if z_score < 0 else "SELL"
-                quote_side = "BUY" if z_score > 0 else "SELL"
-
-                # Get acceptable price in string format with correct number of decimals
-                series_1 = pair_df[base_market].values.astype(float).tolist()
-                series_2 = pair_df[quote_market].values.astype(float).tolist()
-                base_price = series_1[-1]
-                quote_price = series_2[-1]
-
-                accept_base_price = (
-                    float(base_price) * 1.01
-                    if z_score < 0
-                    else float(base_price) * 0.99
+        z_score = float(signal["z_score"])
+
+        # Ensure like-for-like not already open (diversify trading)
+        is_base_open = base_market in open_markets
+        is_quote_open = quote_market in open_markets
+
+        # Place trade
+        if not is_base_open and not is_quote_open:
+            # Determine side
+            base_side = "BUY" if z_score < 0 else "SELL"
+            quote_side = "BUY" if z_score > 0 else "SELL"
+
+            # Get acceptable price in string format with correct number of decimals
+            base_price = float(price_matrix.column(base_market)[-1])
+            quote_price = float(price_matrix.column(quote_market)[-1])
+
+            accept_base_price = (
+                float(base_price) * 1.01 if z_score < 0 else float(base_price) * 0.99
+            )
+
+            accept_quote_price = (
+                float(quote_price) * 1.01 if z_score > 0 else float(quote_price) * 0.99
+            )
+
+            failsafe_base_price = (
+                float(base_price) * 0.05 if z_score < 0 else float(base_price) * 1.7
+            )
+
+            failsafe_quote_price = (
+                float(quote_price) * 0.05 if z_score > 0 else float(quote_price) * 1.7
+            )
+
+            # Format prices
+            accept_base_price = market_index.quantize_price(
+                base_market, accept_base_price
+            )
+            accept_quote_price = market_index.quantize_price(
+                quote_market, accept_quote_price
+            )
+            accept_failsafe_base_price = market_index.quantize_price(
+                base_market, failsafe_base_price
+            )
+            accept_failsafe_quote_price = market_index.quantize_price(
+                quote_market, failsafe_quote_price
+            )
+
+            # Get size
+            base_quantity = 1 / base_price * position_size
+            quote_quantity = 1 / quote_price * position_size
+
+            # Format sizes
+            base_size = market_index.quantize_size(base_market, base_quantity)
+            quote_size = market_index.quantize_size(quote_market, quote_quantity)
+
+            # Ensure size
+            base_min_order_size = market_index.get(base_market)["min_order_size"]
+            quote_min_order_size = market_index.get(quote_market)["min_order_size"]
+            check_base = float(base_quantity) > base_min_order_size
+            check_quote = float(quote_quantity) > quote_min_order_size
+
+            # If checks pass, place trades
+            if check_base and check_quote:
+                # Guard: Ensure collateral
+                if free_collateral < min_collateral:
+                    break
+
+                # Create Bot Agent
+                bot_agent = BotAgent(
+                    client,
+                    market_1=base_market,
+                    market_2=quote_market,
+                    base_side=base_side,
+                    base_size=base_size,
+                    base_price=accept_base_price,
+                    quote_side=quote_side,
+                    quote_size=quote_size,
+                    quote_price=accept_quote_price,
+                    accept_failsafe_base_price=accept_failsafe_base_price,
+                    spread=float(signal["spread"]),
+                    z_score=z_score,
+                    half_life=half_life,
+                    hedge_ratio=float(signal["hedge_ratio"]),
+                    accept_failsafe_quote_price=accept_failsafe_quote_price,
                 )
 
-                accept_quote_price = (
-                    float(quote_price) * 1.01
-                    if z_score > 0
-                    else float(quote_price) * 0.99
-                )
+                # Open Trades
+                bot_open_dict = bot_agent.open_trades()
 
-                failsafe_base_price = (
-                    float(base_price) * 0.05 if z_score < 0 else float(base_price) * 1.7
-                )
+                print(bot_open_dict["comments"])
 
-                base_tick_size = markets["markets"][base_market]["tickSize"]
-                quote_tick_size = markets["markets"][quote_market]["tickSize"]
+                # Guard: Handle failure
+                if bot_open_dict == "failed":
+                    continue
 
-                # Format prices
-                accept_base_price = format_number(accept_base_price, base_tick_size)
-                accept_quote_price = format_number(accept_quote_price, quote_tick_size)
-                accept_failsafe_base_price = format_number(
-                    failsafe_base_price, base_tick_size
-                )
+                # Handle success in opening trades
+                if bot_open_dict["pair_status"] == "LIVE":
+                    # Append to list of bot agents
+                    bot_agents.append(bot_open_dict)
+                    open_markets.add(base_market)
+                    open_markets.add(quote_market)
+                    del bot_open_dict
 
-                # Get size
-                base_quantity = 1 / base_price * position_size
-                quote_quantity = 1 / quote_price * position_size
-                base_step_size = markets["markets"][base_market]["stepSize"]
-                quote_step_size = markets["markets"][quote_market]["stepSize"]
-
-                # Format sizes
-                base_size = format_number(base_quantity, base_step_size)
-                quote_size = format_number(quote_quantity, quote_step_size)
-
-                # Ensure size
-                base_min_order_size = markets["markets"][base_market]["minOrderSize"]
-                quote_min_order_size = markets["markets"][quote_market]["minOrderSize"]
-                check_base = float(base_quantity) > float(base_min_order_size)
-                check_quote = float(quote_quantity) > float(quote_min_order_size)
-
-                # If checks pass, place trades
-                if check_base and check_quote:
-                    # Guard: Ensure collateral
-                    if free_collateral < min_collateral:
-                        break
-
-                    # Create Bot Agent
-                    bot_agent = BotAgent(
-                        client,
-                        market_1=base_market,
-                        market_2=quote_market,
-                        base_side=base_side,
-                        base_size=base_size,
-                        base_price=accept_base_price,
-                        quote_side=quote_side,
-                        quote_size=quote_size,
-                        quote_price=accept_quote_price,
-                        accept_failsafe_base_price=accept_failsafe_base_price,
-                        spread=pair_df["spread"].values.tolist()[-1],
-                        z_score=z_score,
-                        half_life=half_life,
-                        hedge_ratio=pair_df["hedge_ratio"].values.tolist()[-1],
-                    )
-
-                    # Open Trades
-                    bot_open_dict = bot_agent.open_trades()
-
-                    print(bot_open_dict["comments"])
-
-                    # Guard: Handle failure
-                    if bot_open_dict == "failed":
-                        continue
-
-                    # Handle success in opening trades
-                    if bot_open_dict["pair_status"] == "LIVE":
-                        # Append to list of bot agents
-                        bot_agents.append(bot_open_dict)
-                        del bot_open_dict
-
-                        # Confirm live status in print
-                        print("Trade status: Live")
-                        print("---")
+                    # Confirm live status in print
+                    print("Trade status: Live")
+                    print("---")
 
     # Save agents
     print("Success: Manage open trades checked")
@@ -1,11 +1,17 @@
 from constants import CLOSE_AT_ZSCORE_CROSS, ZSCORE_THRESH
-from func_utils import format_number
+from func_markets import get_market_index
 from func_public import get_candles_recent
-from func_cointegration import calculate_hedge_ratio_and_spread, calculate_zscore
-from func_private import place_market_order
+from func_private import place_market_order, get_orders_by_id
+from func_price_cache import get_price_matrix
+from func_metrics import pause
+from func_spread_state import (
+    load_spread_states,
+    save_spread_states,
+    update_spread_state,
+    pair_key,
+)
+import numpy as np
 import json
-import pandas as pd
-import time
 
 from func_messaging import send_message
 
@@ -41,13 +47,23 @@ def manage_trade_exits(client):
         markets_live.append(p)
 
     # Protect API
-    time.sleep(0.5)
+    pause(0.5)
 
     # Get markets for reference of tick size
-    markets = client.public.get_markets().data["markets"]
+    market_index = get_market_index(client)
 
-    # Protect API
-    time.sleep(0.2)
+    # Get all position orders in bulk
+    order_refs = []
+    for position in open_positions_dict:
+        order_refs.append((position["order_id_m1"], position["market_1"]))
+        order_refs.append((position["order_id_m2"], position["market_2"]))
+    orders_by_id = get_orders_by_id(client, order_refs)
+
+    # Load price matrix once for all positions
+    price_matrix = get_price_matrix()
+
+    # Load rolling spread state saved by previous runs
+    spread_states = load_spread_states()
 
     # Check all saved positions match order record
     # Exit trade according to any exit trade rules
@@ -65,23 +81,17 @@ def manage_trade_exits(client):
         position_size_m2 = position["order_m2_size"]
         position_side_m2 = position["order_m2_side"]
 
-        # Protect API
-        time.sleep(0.5)
-
         # Get order info m1 per exchange
-        order_m1 = client.private.get_order_by_id(position["order_id_m1"])
-        order_market_m1 = order_m1.data["order"]["market"]
-        order_size_m1 = order_m1.data["order"]["size"]
-        order_side_m1 = order_m1.data["order"]["side"]
-
-        # Protect API
-        time.sleep(0.5)
+        order_m1 = orders_by_id[position["order_id_m1"]]
+        order_market_m1 = order_m1["market"]
+        order_size_m1 = order_m1["size"]
+        order_side_m1 = order_m1["side"]
 
         # Get order info m2 per exchange
-        order_m2 = client.private.get_order_by_id(position["order_id_m2"])
-        order_market_m2 = order_m2.data["order"]["market"]
-        order_size_m2 = order_m2.data["order"]["size"]
-        order_side_m2 = order_m2.data["order"]["side"]
+        order_m2 = orders_by_id[position["order_id_m2"]]
+        order_market_m2 = order_m2["market"]
+        order_size_m2 = order_m2["size"]
+        order_side_m2 = order_m2["side"]
 
         # Perform matching checks
         check_m1 = (
@@ -117,41 +127,48 @@ def manage_trade_exits(client):
             continue
 
         # Get prices
-        market_prices_df = pd.read_csv("market_prices.csv", index_col="datetime")
-        pair_df = market_prices_df.loc[:, [position_market_m1, position_market_m2]]
-        series_1 = pair_df[position_market_m1].values.astype(float).tolist()
-        series_2 = pair_df[position_market_m2].values.astype(float).tolist()
+        series_1, series_2 = price_matrix.columns(
+            [position_market_m1, position_market_m2]
+        )
 
         # Trigger close based on Z-Score
         if CLOSE_AT_ZSCORE_CROSS:
             # Initialize z_scores
             z_score_traded = position["z_score"]
 
-            if len(series_1) > 0 and len(series_1) == len(series_2):
-                hedge_ratio_and_spread_df = calculate_hedge_ratio_and_spread(
-                    pair_df, position_market_m1, position_market_m2
-                )
-
-                pair_df["hedge_ratio"] = hedge_ratio_and_spread_df["hedge_ratio"]
-                pair_df["spread"] = hedge_ratio_and_spread_df["spread"]
+            # Markets the price stream does not cover end in NaN, wait for data
+            is_priced = (
+                len(series_1) > 0
+                and len(series_1) == len(series_2)
+                and np.isfinite(series_1[-1])
+                and np.isfinite(series_2[-1])
+            )
 
-                z_score_current = calculate_zscore(
-                    pair_df["spread"], 72
-                ).values.tolist()[-1]
+            if is_priced:
+                # Update spread and ZScore from new candles only
+                spread_state = update_spread_state(
+                    spread_states,
+                    position_market_m1,
+                    position_market_m2,
+                    price_matrix.timestamps,
+                    series_1,
+                    series_2,
+                )
+                z_score_current = spread_state.z_score
 
-                position["spread_current"] = pair_df["spread"].values.tolist()[-1]
+                position["spread_current"] = spread_state.spread
                 position["z_score_current"] = z_score_current
 
-            # Determine trigger
-            z_score_level_check = abs(z_score_current) >= 0
-            z_score_cross_check = (z_score_current < 0 and z_score_traded > 0) or (
-                z_score_current > 0 and z_score_traded < 0
-            )
+                # Determine trigger
+                z_score_level_check = abs(z_score_current) >= 0
+                z_score_cross_check = (
+                    z_score_current < 0 and z_score_traded > 0
+                ) or (z_score_current > 0 and z_score_traded < 0)
 
-            # Close trade
-            if z_score_level_check and z_score_cross_check:
-                # Initiate close trigger
-                is_close = True
+                # Close trade
+                if z_score_level_check and z_score_cross_check:
+                    # Initiate close trigger
+                    is_close = True
 
         ###
         # Add any other close logic you want here
@@ -175,10 +192,12 @@ def manage_trade_exits(client):
             price_m2 = float(series_2[-1])
             accept_price_m1 = price_m1 * 1.05 if side_m1 == "BUY" else price_m1 * 0.95
             accept_price_m2 = price_m2 * 1.05 if side_m2 == "BUY" else price_m2 * 0.95
-            tick_size_m1 = markets[position_market_m1]["tickSize"]
-            tick_size_m2 = markets[position_market_m2]["tickSize"]
-            accept_price_m1 = format_number(accept_price_m1, tick_size_m1)
-            accept_price_m2 = format_number(accept_price_m2, tick_size_m2)
+            accept_price_m1 = market_index.quantize_price(
+                position_market_m1, accept_price_m1
+            )
+            accept_price_m2 = market_index.quantize_price(
+                position_market_m2, accept_price_m2
+            )
 
             # Close positions
             try:
@@ -199,7 +218,7 @@ def manage_trade_exits(client):
                 print(">>> Closing <<<")
 
                 # Protect API
-                time.sleep(1)
+                pause(1)
 
                 # Close position for market 2
                 print(">>> Closing market 2 <<<")
@@ -242,14 +261,13 @@ def manage_trade_exits(client):
             print(f">>> Closing {m['market']} <<<")
 
             price_series = get_candles_recent(client, market)
-            time.sleep(0.2)
+            pause(0.2)
             price = float(price_series[-1])
             side = "SELL" if m["side"] == "LONG" else "BUY"
             # Position side will be negative in case of short position
             size = m["size"] if side == "SELL" else m["size"][1:]
-            tick_size = markets[market]["tickSize"]
             accept_price = price * 1.05 if side == "BUY" else price * 0.95
-            accept_price = format_number(accept_price, tick_size)
+            accept_price = market_index.quantize_price(market, accept_price)
 
             try:
                 close_order = place_market_order(
@@ -264,12 +282,19 @@ def manage_trade_exits(client):
                 print(close_order["order"]["id"])
                 print(">>> Closing <<<")
 
-                time.sleep(1)
+                pause(1)
 
             except Exception as e:
                 print(f"Exit failed for market {market}:", e)
                 send_message(f"Exit failed for market {market}: {e}")
 
+    # Save spread state for positions still open only
+    keep_keys = set()
+    for position in save_output:
+        keep_keys.add(pair_key(position["market_1"], position["market_2"]))
+
+    save_spread_states({k: v for k, v in spread_states.items() if k in keep_keys})
+
     # Save remaining items
     print(f"{len(save_output)} Items remaining. Saving file...")
 
@@ -0,0 +1,109 @@
+from constants import MARKET_METADATA_TTL
+from decimal import Decimal
+import threading
+import math
+import time
+
+
+# Split an increment like "0.001" into integer units and decimals
+def parse_increment(increment):
+    """
+    "0.001" -> (1, 3), "0.5" -> (5, 1), "10" -> (10, 0)
+    A value n * units at scale 10 ** -decimals is then always a valid multiple
+    """
+
+    value = Decimal(str(increment)).normalize()
+    decimals = max(0, -value.as_tuple().exponent)
+    units = int(value.scaleb(decimals))
+
+    return units, decimals
+
+
+# Format an integer count of 10 ** -decimals as a decimal string
+def format_scaled(scaled, decimals):
+    if decimals == 0:
+        return str(scaled)
+
+    sign = "-" if scaled < 0 else ""
+    digits = str(abs(scaled)).rjust(decimals + 1, "0")
+    return f"{sign}{digits[:-decimals]}.{digits[-decimals:]}"
+
+
+# Round a number to a multiple of an increment
+def quantize(value, units, decimals):
+    """
+    Rounds to the nearest multiple of units at scale 10 ** -decimals
+    Returns the exchange string format with the increment's decimals
+    """
+
+    steps = math.floor(value * 10**decimals / units + 0.5)
+    return format_scaled(steps * units, decimals)
+
+
+# Class: Cached market metadata
+class MarketIndex:
+    """
+    Loads get_markets once and reloads it after ttl seconds
+    Tick and step sizes are kept as integer units and decimals so orders
+    are rounded with integer arithmetic instead of string formatting
+    """
+
+    # Initialize class
+    def __init__(self, ttl=MARKET_METADATA_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.loaded_at = None
+        self.markets = {}
+
+    # Reload metadata if stale
+    def refresh(self, client, force=False):
+        with self.lock:
+            is_fresh = (
+                self.loaded_at is not None
+                and time.monotonic() - self.loaded_at < self.ttl
+            )
+            if is_fresh and not force:
+                return False
+
+            markets = client.public.get_markets().data["markets"]
+            index = {}
+            for market, market_info in markets.items():
+                tick_units, tick_decimals = parse_increment(market_info["tickSize"])
+                step_units, step_decimals = parse_increment(market_info["stepSize"])
+                index[market] = {
+                    "status": market_info["status"],
+                    "type": market_info["type"],
+                    "tick_units": tick_units,
+                    "tick_decimals": tick_decimals,
+                    "step_units": step_units,
+                    "step_decimals": step_decimals,
+                    "min_order_size": float(market_info["minOrderSize"]),
+                }
+
+            self.markets = index
+            self.loaded_at = time.monotonic()
+            return True
+
+    # Metadata for one market
+    def get(self, market):
+        return self.markets[market]
+
+    # Price rounded to the market tick size
+    def quantize_price(self, market, price):
+        market_info = self.markets[market]
+        return quantize(price, market_info["tick_units"], market_info["tick_decimals"])
+
+    # Size rounded to the market step size
+    def quantize_size(self, market, size):
+        market_info = self.markets[market]
+        return quantize(size, market_info["step_units"], market_info["step_decimals"])
+
+
+# Shared market metadata, kept for the life of the process
+MARKET_INDEX = MarketIndex()
+
+
+# Get market metadata, reloaded when older than the ttl
+def get_market_index(client):
+    MARKET_INDEX.refresh(client)
+    return MARKET_INDEX
@@ -1,16 +1,175 @@
+from constants import (
+    TELEGRAM_TOKEN,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_API_URL,
+    TELEGRAM_BATCH_SECONDS,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_TIMEOUT,
+    TELEGRAM_FLUSH_SECONDS,
+)
 import requests
-from decouple import config
+import threading
+import atexit
+import queue
+import time
 
-# Send Message
+# Telegram rejects longer messages
+TELEGRAM_MAX_LENGTH = 4096
+
+
+# Class: Background Telegram sender
+class TelegramNotifier:
+    """
+    Sends messages from a background thread so callers never wait on Telegram
+    Messages queued within batch_seconds of each other go out as one message
+    Failed sends are retried with exponential backoff
+    """
+
+    # Initialize class
+    def __init__(
+        self,
+        bot_token,
+        chat_id,
+        base_url=TELEGRAM_API_URL,
+        batch_seconds=TELEGRAM_BATCH_SECONDS,
+        max_retries=TELEGRAM_MAX_RETRIES,
+        timeout=TELEGRAM_TIMEOUT,
+    ):
+        self.url = f"{base_url.rstrip('/')}/bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+        self.batch_seconds = batch_seconds
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    # Queue a message, starting the sender on first use
+    def send(self, message):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run)
+                self.thread.daemon = True
+                self.thread.start()
+
+        self.queue.put(str(message))
+        return "queued"
+
+    # Send everything queued and stop the sender
+    def close(self, timeout=TELEGRAM_FLUSH_SECONDS):
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+
+        if thread is None:
+            return
+
+        self.queue.put(None)
+        thread.join(timeout)
+
+    # Sender loop
+    def _run(self):
+        is_stopping = False
+        while not is_stopping:
+            message = self.queue.get()
+            if message is None:
+                break
+
+            # Coalesce a burst of messages into one batch
+            batch = [message]
+            deadline = time.monotonic() + self.batch_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if message is None:
+                    is_stopping = True
+                    break
+                batch.append(message)
+
+            for text in self._join_batch(batch):
+                self._post(text)
+
+    # Join messages into as few Telegram messages as fit
+    def _join_batch(self, batch):
+        texts = []
+        text = ""
+        for message in batch:
+            message = message[:TELEGRAM_MAX_LENGTH]
+            if text and len(text) + 1 + len(message) > TELEGRAM_MAX_LENGTH:
+                texts.append(text)
+                text = ""
+            text = f"{text}\n{message}" if text else message
+
+        if text:
+            texts.append(text)
+        return texts
+
+    # Post one message with retries
+    def _post(self, text):
+        delay = 1
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = self.session.post(
+                    self.url,
+                    data={"chat_id": self.chat_id, "text": text},
+                    timeout=self.timeout,
+                )
+                if res.status_code == 200:
+                    return "sent"
 
+                # Guard: Client errors other than rate limits will not succeed on retry
+                if res.status_code != 429 and res.status_code < 500:
+                    print(f"Telegram rejected message: {res.status_code} {res.text}")
+                    return "failed"
 
+                # Wait as long as Telegram asks when rate limited
+                if res.status_code == 429:
+                    try:
+                        retry_after = res.json()["parameters"]["retry_after"]
+                        delay = max(delay, retry_after)
+                    except (ValueError, KeyError, TypeError):
+                        pass
+
+            except requests.RequestException as e:
+                print(f"Telegram send failed: {e}")
+
+            if attempt < self.max_retries:
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+        print("Telegram send failed after retries")
+        return "failed"
+
+
+# Shared notifier, created on first message
+NOTIFIER = None
+NOTIFIER_LOCK = threading.Lock()
+
+
+# Get shared notifier
+def get_notifier():
+    global NOTIFIER
+    with NOTIFIER_LOCK:
+        if NOTIFIER is None:
+            NOTIFIER = TelegramNotifier(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+
+            # Deliver queued messages before exit, including code red aborts
+            atexit.register(NOTIFIER.close)
+
+    return NOTIFIER
+
+
+# Send Message
 def send_message(message):
-    bot_token = config("TELEGRAM_TOKEN")
-    chat_id = config("TELEGRAM_CHAT_ID")
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage?chat_id={chat_id}&text={message}"
-    res = requests.get(url)
-
-    if res.status_code == 200:
-        return "sent"
-    else:
+    # Guard: Telegram not configured
+    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
+        print(f"Telegram not configured, message not sent: {message}")
         return "failed"
+
+    return get_notifier().send(message)
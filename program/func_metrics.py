@@ -0,0 +1,262 @@
+from constants import (
+    METRICS_FILE,
+    METRICS_FILE_MAX_BYTES,
+    METRICS_FILE_BACKUPS,
+    PROFILE_FILE,
+)
+from contextlib import contextmanager
+import functools
+import threading
+import cProfile
+import pstats
+import json
+import time
+import os
+
+# Path prefixes kept when grouping requests, drops ids and markets
+ENDPOINT_PATH_SEGMENTS = 3
+
+
+# Class: Request counts and latency per API endpoint
+class EndpointMetrics:
+    """
+    Thread safe counters keyed by "METHOD /v3/endpoint"
+    Latency is time until response headers, as measured by requests
+    """
+
+    # Initialize class
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.endpoints = {}
+
+    # Record one request
+    def record(self, endpoint, seconds, is_error=False):
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = {
+                    "count": 0,
+                    "errors": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                }
+                self.endpoints[endpoint] = stats
+
+            stats["count"] += 1
+            stats["errors"] += int(is_error)
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    # Copy of the counters with mean latency
+    def snapshot(self):
+        with self.lock:
+            snapshot = {}
+            for endpoint, stats in self.endpoints.items():
+                snapshot[endpoint] = dict(stats)
+                snapshot[endpoint]["mean_seconds"] = (
+                    stats["total_seconds"] / stats["count"]
+                )
+
+        return snapshot
+
+    # Total requests and seconds across endpoints
+    def totals(self):
+        with self.lock:
+            count = sum(stats["count"] for stats in self.endpoints.values())
+            seconds = sum(stats["total_seconds"] for stats in self.endpoints.values())
+
+        return count, seconds
+
+    # Clear counters
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.started_at = time.time()
+
+    # Printable summary, slowest endpoints first
+    def summary(self):
+        snapshot = self.snapshot()
+        lines = []
+        for endpoint, stats in sorted(
+            snapshot.items(), key=lambda item: -item[1]["total_seconds"]
+        ):
+            lines.append(
+                f"{endpoint}: {stats['count']} calls, {stats['errors']} errors, "
+                f"mean {stats['mean_seconds'] * 1000:.0f}ms, "
+                f"max {stats['max_seconds'] * 1000:.0f}ms"
+            )
+
+        return "\n".join(lines)
+
+
+# Metrics for requests made through the dydx3 client
+API_METRICS = EndpointMetrics()
+
+
+# Group a request path into an endpoint name
+def endpoint_name(method, path_url):
+    path = path_url.split("?")[0]
+    path = "/".join(path.split("/")[:ENDPOINT_PATH_SEGMENTS])
+    return f"{method} {path}"
+
+
+# requests response hook recording latency
+def record_response(response, *args, **kwargs):
+    endpoint = endpoint_name(response.request.method, response.request.path_url)
+    API_METRICS.record(
+        endpoint,
+        response.elapsed.total_seconds(),
+        is_error=response.status_code >= 400,
+    )
+
+
+# Class: Wall time, sleep and API usage per stage of a run
+class StageMetrics:
+    """
+    A run is one tick or refresh, split into named stages
+    API metrics are reset when a run starts so each record covers only its run
+    Sleep in the main thread is part of a stage's wall time, sleep in worker
+    threads such as rate limited candle fetches is reported separately
+    """
+
+    # Initialize class
+    def __init__(self, api_metrics):
+        self.api_metrics = api_metrics
+        self.lock = threading.Lock()
+        self.start_run()
+
+    # Begin a new run
+    def start_run(self):
+        self.api_metrics.reset()
+        with self.lock:
+            self.started_at = time.time()
+            self.run_started = time.perf_counter()
+            self.stages = {}
+            self.sleep_seconds = 0.0
+            self.worker_sleep_seconds = 0.0
+
+    # Record time spent sleeping
+    def record_sleep(self, seconds):
+        with self.lock:
+            if threading.current_thread() is threading.main_thread():
+                self.sleep_seconds += seconds
+            else:
+                self.worker_sleep_seconds += seconds
+
+    # Time a named stage
+    @contextmanager
+    def stage(self, name):
+        with self.lock:
+            sleep_at_start = (self.sleep_seconds, self.worker_sleep_seconds)
+        api_at_start = self.api_metrics.totals()
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            api_calls, api_seconds = self.api_metrics.totals()
+            with self.lock:
+                self.stages[name] = {
+                    "seconds": seconds,
+                    "sleep_seconds": self.sleep_seconds - sleep_at_start[0],
+                    "worker_sleep_seconds": (
+                        self.worker_sleep_seconds - sleep_at_start[1]
+                    ),
+                    "api_calls": api_calls - api_at_start[0],
+                    "api_seconds": api_seconds - api_at_start[1],
+                }
+
+    # Summary of the run so far
+    def finish_run(self, kind):
+        seconds = time.perf_counter() - self.run_started
+        api_calls, api_seconds = self.api_metrics.totals()
+
+        with self.lock:
+            return {
+                "kind": kind,
+                "started_at": self.started_at,
+                "seconds": seconds,
+                "sleep_seconds": self.sleep_seconds,
+                "work_seconds": seconds - self.sleep_seconds,
+                "worker_sleep_seconds": self.worker_sleep_seconds,
+                "api_calls": api_calls,
+                "api_seconds": api_seconds,
+                "stages": dict(self.stages),
+                "endpoints": self.api_metrics.snapshot(),
+            }
+
+
+# Stage timings for the current run
+STAGE_METRICS = StageMetrics(API_METRICS)
+
+# Set to capture the next tick with cProfile
+PROFILE_NEXT_TICK = threading.Event()
+
+
+# Sleep and count it as idle time
+def pause(seconds):
+    started = time.perf_counter()
+    time.sleep(seconds)
+    STAGE_METRICS.record_sleep(time.perf_counter() - started)
+
+
+# Shift metrics.jsonl to metrics.jsonl.1 and so on
+def rotate_metrics_file(path=METRICS_FILE, backups=METRICS_FILE_BACKUPS):
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+
+    if backups > 0:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+
+# Append one record to the metrics file
+def write_metrics(record, path=METRICS_FILE, max_bytes=METRICS_FILE_MAX_BYTES):
+    # Guard: Metrics file disabled
+    if not path:
+        return
+
+    try:
+        if os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+            rotate_metrics_file(path)
+
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Error writing metrics: {e}")
+
+
+# Run with cProfile and save stats
+def profile_call(func, *args, path=PROFILE_FILE):
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        profiler.dump_stats(path)
+        print(f"Profile saved to {path}, slowest calls:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+# Decorator: time a run and write its metrics
+def measure_run(kind):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            STAGE_METRICS.start_run()
+            try:
+                # Profile one tick when requested
+                if kind == "tick" and PROFILE_NEXT_TICK.is_set():
+                    PROFILE_NEXT_TICK.clear()
+                    return profile_call(func, *args)
+
+                return func(*args)
+            finally:
+                write_metrics(STAGE_METRICS.finish_run(kind))
+
+        return wrapper
+
+    return decorator
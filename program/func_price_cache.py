@@ -0,0 +1,191 @@
+import func_stream
+import pandas as pd
+import numpy as np
+import json
+import os
+
+# Price matrix files
+MARKET_PRICES_CSV = "market_prices.csv"
+MARKET_PRICES_MATRIX = "market_prices.npy"
+MARKET_PRICES_INDEX = "market_prices_index.json"
+
+
+# Save market prices
+def save_market_prices(df_market_prices):
+    """
+    Persist prices as a column-major float64 matrix plus a JSON index
+    Column-major keeps every market contiguous so columns load as views
+    """
+
+    matrix = np.asfortranarray(df_market_prices.values.astype(np.float64))
+    index = {
+        "datetime": df_market_prices.index.astype(str).tolist(),
+        "markets": df_market_prices.columns.astype(str).tolist(),
+    }
+
+    # Write to temporary files then swap in so readers never see half a file
+    with open(f"{MARKET_PRICES_MATRIX}.tmp", "wb") as f:
+        np.save(f, matrix)
+    with open(f"{MARKET_PRICES_INDEX}.tmp", "w") as f:
+        json.dump(index, f)
+
+    os.replace(f"{MARKET_PRICES_MATRIX}.tmp", MARKET_PRICES_MATRIX)
+    os.replace(f"{MARKET_PRICES_INDEX}.tmp", MARKET_PRICES_INDEX)
+
+
+# One time migration from the CSV price file
+def migrate_market_prices_csv():
+    if os.path.exists(MARKET_PRICES_MATRIX) or not os.path.exists(MARKET_PRICES_CSV):
+        return False
+
+    print("Migrating market_prices.csv to binary price cache...")
+    df_market_prices = pd.read_csv(MARKET_PRICES_CSV, index_col="datetime")
+    save_market_prices(df_market_prices)
+
+    return True
+
+
+# Load market prices
+def load_market_prices(markets=None):
+    """
+    Memory-map the price matrix and return a DataFrame indexed by datetime
+    Pass markets to only pull the columns needed
+    """
+
+    migrate_market_prices_csv()
+
+    matrix = np.load(MARKET_PRICES_MATRIX, mmap_mode="r")
+    with open(MARKET_PRICES_INDEX) as f:
+        index = json.load(f)
+
+    datetime_index = pd.Index(index["datetime"], name="datetime")
+
+    # Return every market without copying
+    if markets is None:
+        return pd.DataFrame(matrix, index=datetime_index, columns=index["markets"])
+
+    # Slice requested markets only
+    positions = {market: i for i, market in enumerate(index["markets"])}
+    columns = [positions[market] for market in markets]
+
+    return pd.DataFrame(matrix[:, columns], index=datetime_index, columns=markets)
+
+
+# Class: Shared read-only access to the price matrix
+class PriceMatrix:
+    """
+    Memory-maps the price matrix once and reuses it while the files are unchanged
+    Hands out read-only NumPy column views so pairs need no DataFrame copies
+    Completed candles from the live price stream are appended per refresh
+    The stored last row is replaced by its streamed close once that candle ends
+    """
+
+    # Initialize class
+    def __init__(
+        self, matrix_path=MARKET_PRICES_MATRIX, index_path=MARKET_PRICES_INDEX
+    ):
+        self.matrix_path = matrix_path
+        self.index_path = index_path
+        self.loaded_mtimes = None
+        self.matrix = None
+        self.markets = []
+        self.positions = {}
+        self.file_timestamps = pd.Index([], name="datetime")
+        self.timestamps = self.file_timestamps
+        self.tail = None
+
+    # Reload files if they changed and pick up newly streamed candles
+    def refresh(self):
+        migrate_market_prices_csv()
+
+        mtimes = (
+            os.stat(self.matrix_path).st_mtime_ns,
+            os.stat(self.index_path).st_mtime_ns,
+        )
+        if mtimes != self.loaded_mtimes:
+            self.matrix = np.load(self.matrix_path, mmap_mode="r")
+            with open(self.index_path) as f:
+                index = json.load(f)
+
+            self.markets = index["markets"]
+            self.positions = {market: i for i, market in enumerate(self.markets)}
+            self.file_timestamps = pd.Index(index["datetime"], name="datetime")
+            self.loaded_mtimes = mtimes
+
+        self._refresh_stream_tail()
+
+    # Completed streamed candles from the last stored row on
+    def _refresh_stream_tail(self):
+        """
+        The tail starts with a replacement for the last stored row, which may
+        have been saved while its candle was still open
+        Markets the stream does not cover stay NaN after the stored rows so
+        the z-score pass drops their pairs instead of seeing a flat price
+        """
+
+        self.tail = None
+        self.timestamps = self.file_timestamps
+
+        stream = func_stream.ACTIVE_STREAM
+        if stream is None or len(self.file_timestamps) == 0:
+            return
+
+        streamed_df = stream.get_closed_candles(self.markets, self.file_timestamps[-1])
+        if streamed_df is None or len(streamed_df) == 0:
+            return
+
+        tail = np.full((len(streamed_df), len(self.markets)), np.nan)
+        is_covered = np.zeros(len(self.markets), dtype=bool)
+        is_covered[[self.positions[m] for m in streamed_df.columns]] = True
+        tail[:, is_covered] = streamed_df.values
+
+        # Quiet markets carry the last known close forward
+        last_row = np.asarray(self.matrix[-1], dtype=np.float64)
+        for i in range(len(tail)):
+            missing = np.isnan(tail[i]) & (is_covered | (i == 0))
+            tail[i, missing] = last_row[missing]
+            last_row = tail[i]
+
+        tail.setflags(write=False)
+        self.tail = tail
+        self.timestamps = self.file_timestamps.append(streamed_df.index[1:])
+
+    # Check market is in the matrix
+    def has_market(self, market):
+        return market in self.positions
+
+    # Prices for one market, oldest first
+    def column(self, market):
+        prices = self.matrix[:, self.positions[market]]
+
+        # Guard: Only copy when streamed candles need appending
+        if self.tail is None:
+            return prices
+
+        prices = np.concatenate([prices[:-1], self.tail[:, self.positions[market]]])
+        prices.setflags(write=False)
+        return prices
+
+    # Latest rows for every market as a (time, market) array
+    def recent_rows(self, n_rows):
+        rows = self.matrix[-n_rows:]
+
+        # Guard: Only copy when streamed candles need appending
+        if self.tail is None:
+            return rows
+
+        return np.concatenate([rows[:-1], self.tail])[-n_rows:]
+
+    # Prices for several markets
+    def columns(self, markets):
+        return [self.column(market) for market in markets]
+
+
+# Shared price matrix, resident for the life of the process
+PRICE_MATRIX = PriceMatrix()
+
+
+# Get the shared price matrix, refreshed for this tick
+def get_price_matrix():
+    PRICE_MATRIX.refresh()
+    return PRICE_MATRIX
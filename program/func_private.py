@@ -1,5 +1,14 @@
+from constants import (
+    ORDER_CLOCK_REFRESH_SECONDS,
+    ORDER_CONFIRM_TIMEOUT,
+    ORDER_POLL_INITIAL_DELAY,
+    ORDER_POLL_MAX_DELAY,
+)
+from dydx3.helpers.request_helpers import random_client_id
+from dydx3.starkex.order import SignableOrder
 from datetime import datetime, timedelta
-from func_utils import format_number
+from func_markets import get_market_index
+from func_metrics import pause
 import time
 import json
 
@@ -10,7 +19,7 @@ from pprint import pprint
 def is_open_positions(client, market):
 
     # Protect API
-    time.sleep(0.2)
+    pause(0.2)
 
     # Get positions
     all_positions = client.private.get_positions(
@@ -25,6 +34,19 @@ def is_open_positions(client, market):
         return False
 
 
+# Get set of markets with open positions in one request
+def get_open_position_markets(client):
+    # Get positions
+    all_positions = client.private.get_positions(status="OPEN")
+
+    # Collect markets
+    open_markets = set()
+    for position in all_positions.data["positions"]:
+        open_markets.add(position["market"])
+
+    return open_markets
+
+
 # Check order status
 def check_order_status(client, order_id):
     order = client.private.get_order_by_id(order_id)
@@ -34,37 +56,197 @@ def check_order_status(client, order_id):
     return "FAILED"
 
 
-# Place market order
-def place_market_order(client, market, side, size, price, reduce_only):
-    # Get Position Id
-    account_response = client.private.get_account()
-    position_id = account_response.data["account"]["positionId"]
+# Get orders in bulk, indexed by id
+def get_orders_by_id(client, order_refs, status="FILLED", page_limit=100, max_pages=10):
+    """
+    order_refs is a list of (order_id, market)
+    Pages back through each market's orders until every id is found or
+    max_pages is reached
+    Falls back to get_order_by_id for any ids still missing
+    """
+
+    # Group wanted ids by market
+    wanted_ids = {}
+    for order_id, market in order_refs:
+        wanted_ids.setdefault(market, set()).add(order_id)
+
+    orders_by_id = {}
+    for market, order_ids in wanted_ids.items():
+        created_before_or_at = None
+        for _ in range(max_pages):
+            orders = client.private.get_orders(
+                market=market,
+                status=status,
+                limit=page_limit,
+                created_before_or_at=created_before_or_at,
+            ).data["orders"]
+
+            for order in orders:
+                if order["id"] in order_ids:
+                    orders_by_id[order["id"]] = order
+
+            # Guard: Stop once all found or on the last page
+            if order_ids.issubset(orders_by_id) or len(orders) < page_limit:
+                break
+
+            # Guard: Stop if the page cursor does not move
+            if orders[-1]["createdAt"] == created_before_or_at:
+                break
+            created_before_or_at = orders[-1]["createdAt"]
+
+    # Look up anything not found individually
+    for order_id, market in order_refs:
+        if order_id not in orders_by_id:
+            order = client.private.get_order_by_id(order_id)
+            orders_by_id[order_id] = order.data["order"]
+
+    return orders_by_id
+
+
+# Order statuses that will not change again
+ORDER_TERMINAL_STATUSES = ("FILLED", "CANCELED")
+
+
+# Wait for order to reach a terminal status
+def wait_for_order_status(
+    client,
+    order_id,
+    timeout=ORDER_CONFIRM_TIMEOUT,
+    initial_delay=ORDER_POLL_INITIAL_DELAY,
+    max_delay=ORDER_POLL_MAX_DELAY,
+):
+    """
+    Poll order status with exponential backoff
+    Returns as soon as the order is FILLED or CANCELED
+    Returns the last status seen if the timeout passes first
+    """
+
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    order_status = "FAILED"
+
+    while True:
+        pause(delay)
+
+        # Order may not be queryable yet straight after placement
+        try:
+            order_status = check_order_status(client, order_id)
+        except Exception as e:
+            print(f"Order {order_id} status check failed: {e}")
+
+        if order_status in ORDER_TERMINAL_STATUSES:
+            return order_status
+
+        # Guard: Give up once out of time
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return order_status
+
+        delay = min(delay * 2, max_delay, remaining)
+
+
+# Order context per client - position id and server clock offset
+ORDER_CONTEXT = {}
 
-    # Get expiration time
+
+# Sync server clock offset
+def sync_server_clock(client, context):
+    # Use midpoint of the request to cancel out latency
+    sent_at = time.time()
     server_time = client.public.get_time()
-    expiration = server_time.data["epoch"] + 70
+    received_at = time.time()
 
-    # Place an order
-    placed_order = client.private.create_order(
-        position_id=position_id,  # required for creating the order signature
-        market=market,
-        side=side,
-        order_type="MARKET",
-        post_only=False,
-        size=size,
-        price=price,
-        limit_fee='0.015',
-        expiration_epoch_seconds=expiration,
-        time_in_force="FOK",
-        reduce_only=reduce_only
-    )
+    context["clock_offset"] = server_time.data["epoch"] - (sent_at + received_at) / 2
+    context["clock_synced_at"] = time.monotonic()
+
+
+# Prime order context from an account response already fetched
+def prime_order_context(client, account_response):
+    context = {
+        "position_id": account_response.data["account"]["positionId"],
+        "clock_offset": 0.0,
+        "clock_synced_at": None,
+    }
+    sync_server_clock(client, context)
+    ORDER_CONTEXT[id(client)] = context
+
+    return context
 
-    # print(placed_order.data)
+
+# Get cached order context
+def get_order_context(client):
+    context = ORDER_CONTEXT.get(id(client))
+
+    # Fetch position id once per session
+    if context is None:
+        context = prime_order_context(client, client.private.get_account())
+
+    # Refresh server clock offset on schedule
+    clock_age = time.monotonic() - context["clock_synced_at"]
+    if clock_age > ORDER_CLOCK_REFRESH_SECONDS:
+        sync_server_clock(client, context)
+
+    return context
+
+
+# Prepare and sign a market order without sending it
+def prepare_market_order(client, market, side, size, price, reduce_only):
+    # Get Position Id
+    context = get_order_context(client)
+    position_id = context["position_id"]
+
+    # Get expiration time from local clock corrected to server time
+    expiration = time.time() + context["clock_offset"] + 70
+
+    order_params = {
+        "position_id": position_id,  # required for creating the order signature
+        "market": market,
+        "side": side,
+        "order_type": "MARKET",
+        "post_only": False,
+        "size": size,
+        "price": price,
+        "limit_fee": "0.015",
+        "expiration_epoch_seconds": expiration,
+        "time_in_force": "FOK",
+        "reduce_only": reduce_only,
+        "client_id": random_client_id(),
+    }
+
+    # Sign now so submitting is a single request
+    stark_private_key = getattr(client.private, "stark_private_key", None)
+    if stark_private_key:
+        order_to_sign = SignableOrder(
+            network_id=client.private.network_id,
+            position_id=position_id,
+            client_id=order_params["client_id"],
+            market=market,
+            side=side,
+            human_size=size,
+            human_price=price,
+            limit_fee=order_params["limit_fee"],
+            expiration_epoch_seconds=expiration,
+        )
+        order_params["signature"] = order_to_sign.sign(stark_private_key)
+
+    return order_params
+
+
+# Submit a prepared order
+def submit_market_order(client, order_params):
+    # Place an order
+    placed_order = client.private.create_order(**order_params)
 
     # Return result
     return placed_order.data
 
 
+# Place market order
+def place_market_order(client, market, side, size, price, reduce_only):
+    order_params = prepare_market_order(client, market, side, size, price, reduce_only)
+    return submit_market_order(client, order_params)
+
+
 # Abort all open positions
 def abort_all_positions(client):
 
@@ -72,13 +254,10 @@ def abort_all_positions(client):
     client.private.cancel_all_orders()
 
     # Protect API
-    time.sleep(0.5)
+    pause(0.5)
 
     # Get markets for reference of tick size
-    markets = client.public.get_markets().data
-
-    # Protect API
-    time.sleep(0.5)
+    market_index = get_market_index(client)
 
     # Get all open positions
     positions = client.private.get_positions(status="OPEN")
@@ -102,8 +281,7 @@ def abort_all_positions(client):
             # Get Price
             price = float(position["entryPrice"])
             accept_price = price * 1.7 if side == "BUY" else price * 0.3
-            tick_size = markets["markets"][market]["tickSize"]
-            accept_price = format_number(accept_price, tick_size)
+            accept_price = market_index.quantize_price(market, accept_price)
 
             # Place order to close
             order = place_market_order(
@@ -119,7 +297,7 @@ def abort_all_positions(client):
             close_orders.append(order)
 
             # Protect API
-            time.sleep(0.2)
+            pause(0.2)
 
         # Override json file with empty list
         bot_agents = []
@@ -1,20 +1,29 @@
-from constants import RESOLUTION
+from constants import RESOLUTION, CANDLE_FETCH_WORKERS
 from func_utils import get_ISO_times
+from func_rate_limit import PUBLIC_API_LIMITER
+from func_candle_store import CandleStore
+from func_price_cache import save_market_prices
+import func_stream
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-import time
 
-# Get relevant time periods for ISO from and to
-ISO_TIMES = get_ISO_times()
+# Local candle history, only the missing tail is downloaded
+CANDLE_STORE = CandleStore()
 
 
 # Get Candles recent
 def get_candles_recent(client, market):
+    # Use live stream when running
+    stream = func_stream.ACTIVE_STREAM
+    if stream is not None and stream.has_market(market):
+        return stream.get_candles_recent(market)
+
     # Define output
     close_prices = []
 
     # Protect API
-    time.sleep(0.2)
+    PUBLIC_API_LIMITER.acquire()
 
     # Get data
     candles = client.public.get_candles(market=market, resolution=RESOLUTION, limit=100)
@@ -30,42 +39,116 @@ def get_candles_recent(client, market):
     return prices_result
 
 
+# Get Candles for a single time range
+def get_candles_range(client, market, from_iso, to_iso):
+    # Define output
+    close_prices = []
+
+    # Protect rate limits
+    PUBLIC_API_LIMITER.acquire()
+
+    # Get data
+    candles = client.public.get_candles(
+        market=market,
+        resolution=RESOLUTION,
+        from_iso=from_iso,
+        to_iso=to_iso,
+        limit=100,
+    )
+
+    # Structure data
+    for candle in candles.data["candles"]:
+        close_prices.append({"datetime": candle["startedAt"], market: candle["close"]})
+
+    return close_prices
+
+
+# Get time ranges still missing from the candle store for a market
+def get_missing_ranges(market, iso_times):
+    last_timestamp = CANDLE_STORE.last_timestamp(market)
+    if last_timestamp is None:
+        return iso_times
+    return get_ISO_times(since=last_timestamp)
+
+
+# Save fetched candles and return the stored history window
+def update_candle_store(market, close_prices, iso_times):
+    CANDLE_STORE.append(market, close_prices)
+    history_from_iso = list(iso_times.values())[-1]["from_iso"]
+    return CANDLE_STORE.load(market, from_iso=history_from_iso)
+
+
 # Get Candles Historical
 def get_candles_historical(client, market):
     # Define output
     close_prices = []
 
-    # Extract historical price data for each timeframe
-    for timeframe in ISO_TIMES.keys():
-        # Confirm times needed
-        tf_obj = ISO_TIMES[timeframe]
-        from_iso = tf_obj["from_iso"]
-        to_iso = tf_obj["to_iso"]
+    # Get relevant time periods for ISO from and to
+    iso_times = get_ISO_times()
 
-        # Protect rate limits
-        time.sleep(0.2)
+    # Extract missing price data for each timeframe
+    missing_iso_times = get_missing_ranges(market, iso_times)
+    for timeframe in missing_iso_times.keys():
+        # Confirm times needed
+        tf_obj = missing_iso_times[timeframe]
 
         # Get data
-        candles = client.public.get_candles(
-            market=market,
-            resolution=RESOLUTION,
-            from_iso=from_iso,
-            to_iso=to_iso,
-            limit=100,
+        close_prices.extend(
+            get_candles_range(client, market, tf_obj["from_iso"], tf_obj["to_iso"])
         )
 
-        # Structure data
-        for candle in candles.data["candles"]:
-            close_prices.append(
-                {"datetime": candle["startedAt"], market: candle["close"]}
-            )
-
-    # Construct and return DataFrame
-    close_prices.reverse()
+    # Append new candles and read back full history, oldest first
+    close_prices = update_candle_store(market, close_prices, iso_times)
+    CANDLE_STORE.save_index()
 
     return close_prices
 
 
+# Get Candles Historical for many markets concurrently
+def get_candles_historical_many(client, markets):
+    """
+    Schedule every missing (market, timeframe) request on a shared thread pool
+    The token bucket keeps the pool within the exchange rate limit
+    Returns close prices per market in the same order as get_candles_historical
+    """
+
+    # Get relevant time periods for ISO from and to
+    iso_times = get_ISO_times()
+
+    # Submit all requests up front
+    futures = {}
+    with ThreadPoolExecutor(max_workers=CANDLE_FETCH_WORKERS) as executor:
+        for market in markets:
+            missing_iso_times = get_missing_ranges(market, iso_times)
+            futures[market] = []
+            for timeframe in missing_iso_times.keys():
+                tf_obj = missing_iso_times[timeframe]
+                futures[market].append(
+                    executor.submit(
+                        get_candles_range,
+                        client,
+                        market,
+                        tf_obj["from_iso"],
+                        tf_obj["to_iso"],
+                    )
+                )
+
+    # Append new candles per market and read back full history
+    close_prices_by_market = {}
+    for market in markets:
+        close_prices = []
+        for future in futures[market]:
+            close_prices.extend(future.result())
+
+        close_prices_by_market[market] = update_candle_store(
+            market, close_prices, iso_times
+        )
+
+    CANDLE_STORE.save_index()
+
+    return close_prices_by_market
+
+
 # Construct market prices
 def construct_market_prices(client):
     # Declare variables
@@ -78,15 +161,18 @@ def construct_market_prices(client):
         if market_info["status"] == "ONLINE" and market_info["type"] == "PERPETUAL":
             tradeable_markets.append(market)
 
+    # Fetch all markets concurrently
+    # You can limit the amount to loop though here to save time in development
+    close_prices_by_market = get_candles_historical_many(client, tradeable_markets)
+
     # Set initial DateFrame
-    close_prices = get_candles_historical(client, tradeable_markets[0])
+    close_prices = close_prices_by_market[tradeable_markets[0]]
     df = pd.DataFrame(close_prices)
     df.set_index("datetime", inplace=True)
 
     # Append other prices to DataFrame
-    # You can limit the amount to loop though here to save time in development
     for market in tradeable_markets[1:]:
-        close_prices_add = get_candles_historical(client, market)
+        close_prices_add = close_prices_by_market[market]
         df_add = pd.DataFrame(close_prices_add)
         df_add.set_index("datetime", inplace=True)
         df = pd.merge(df, df_add, how="outer", on="datetime", copy=False)
@@ -99,7 +185,7 @@ def construct_market_prices(client):
         print(nans)
         df.drop(columns=nans, inplace=True)
 
-    df.to_csv("market_prices.csv")
+    save_market_prices(df)
 
     # Return result
     return df
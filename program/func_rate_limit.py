@@ -0,0 +1,47 @@
+from constants import API_RATE_LIMIT_REQUESTS, API_RATE_LIMIT_SECONDS
+from func_metrics import pause
+import threading
+import time
+
+
+# Class: Token bucket rate limiter shared across threads
+class TokenBucket:
+
+    """
+    Hands out one token per request and refills at the exchange's quota rate
+    Callers block in acquire() only when the bucket is empty
+    """
+
+    # Initialize class
+    def __init__(self, capacity, period):
+        self.capacity = float(capacity)
+        self.refill_rate = float(capacity) / float(period)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Refill tokens based on elapsed time
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+        self.updated_at = now
+
+    # Take one token, waiting if none are available
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait_seconds = (1 - self.tokens) / self.refill_rate
+
+            # Sleep outside the lock so other threads can refill too
+            pause(wait_seconds)
+
+
+# Shared limiter for public REST endpoints
+PUBLIC_API_LIMITER = TokenBucket(API_RATE_LIMIT_REQUESTS, API_RATE_LIMIT_SECONDS)
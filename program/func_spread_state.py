@@ -0,0 +1,291 @@
+from constants import HEDGE_RATIO_WINDOW, ZSCORE_WINDOW
+from collections import deque
+import math
+import json
+
+# Saved per-pair state between runs
+SPREAD_STATE_FILE = "spread_state.json"
+
+
+# Class: Rolling hedge ratio, spread and z-score for one pair
+class PairSpreadState:
+    """
+    Keeps ring buffers of recent prices and spreads with their running sums
+    Each new candle updates hedge ratio, spread and z-score in O(1)
+    Matches calculate_hedge_ratio_and_spread followed by calculate_zscore
+    Buffers hold one value more than their window so the last candle can be
+    popped and pushed again when it is revised
+    """
+
+    # Initialize class
+    def __init__(self, hedge_window=HEDGE_RATIO_WINDOW, zscore_window=ZSCORE_WINDOW):
+        self.hedge_window = hedge_window
+        self.zscore_window = zscore_window
+        self.last_timestamp = None
+        self.previous_timestamp = None
+        self.last_pushed_spread = None
+        self.prices_1 = deque(maxlen=hedge_window + 1)
+        self.prices_2 = deque(maxlen=hedge_window + 1)
+        self.spreads = deque(maxlen=zscore_window + 1)
+        self.hedge_ratio = math.nan
+        self.spread = math.nan
+        self.updates = 0
+        self._resync()
+
+    # Recompute running sums from the buffers to clear float drift
+    def _resync(self):
+        prices_1 = list(self.prices_1)[-self.hedge_window :]
+        prices_2 = list(self.prices_2)[-self.hedge_window :]
+        spreads = list(self.spreads)[-self.zscore_window :]
+        self.sum_xx = sum(x * x for x in prices_2)
+        self.sum_xy = sum(x * y for x, y in zip(prices_2, prices_1))
+
+        # Spread sums are shifted by their mean to keep the variance accurate
+        n_spreads = len(spreads)
+        self.spread_shift = sum(spreads) / n_spreads if n_spreads > 0 else 0.0
+        self.sum_spread = sum(s - self.spread_shift for s in spreads)
+        self.sum_spread_sq = sum((s - self.spread_shift) ** 2 for s in spreads)
+
+    # Hedge ratio and spread of the latest prices
+    def _update_spread(self):
+        if len(self.prices_2) < self.hedge_window or self.sum_xx == 0:
+            self.hedge_ratio = math.nan
+            self.spread = math.nan
+            return False
+
+        self.hedge_ratio = self.sum_xy / self.sum_xx
+        self.spread = self.prices_1[-1] - self.prices_2[-1] * self.hedge_ratio
+        return True
+
+    # Add one candle
+    def push(self, timestamp, price_1, price_2):
+        # Drop the oldest prices from the hedge window
+        if len(self.prices_2) >= self.hedge_window:
+            self.sum_xx -= self.prices_2[-self.hedge_window] ** 2
+            self.sum_xy -= (
+                self.prices_2[-self.hedge_window] * self.prices_1[-self.hedge_window]
+            )
+
+        self.prices_1.append(price_1)
+        self.prices_2.append(price_2)
+        self.sum_xx += price_2 * price_2
+        self.sum_xy += price_2 * price_1
+        self.previous_timestamp = self.last_timestamp
+        self.last_timestamp = timestamp
+
+        # Guard: Hedge ratio undefined until the window is full
+        self.last_pushed_spread = self._update_spread()
+        if not self.last_pushed_spread:
+            return
+
+        # Drop the oldest spread from the z-score window
+        if len(self.spreads) >= self.zscore_window:
+            oldest = self.spreads[-self.zscore_window] - self.spread_shift
+            self.sum_spread -= oldest
+            self.sum_spread_sq -= oldest * oldest
+
+        self.spreads.append(self.spread)
+        newest = self.spread - self.spread_shift
+        self.sum_spread += newest
+        self.sum_spread_sq += newest * newest
+
+        # Periodically rebuild sums
+        self.updates += 1
+        if self.updates % self.zscore_window == 0:
+            self._resync()
+
+    # Undo the last push, only one level deep
+    def pop(self):
+        # Remove the last spread and restore the one it pushed out
+        if self.last_pushed_spread:
+            newest = self.spreads.pop() - self.spread_shift
+            self.sum_spread -= newest
+            self.sum_spread_sq -= newest * newest
+            if len(self.spreads) >= self.zscore_window:
+                oldest = self.spreads[-self.zscore_window] - self.spread_shift
+                self.sum_spread += oldest
+                self.sum_spread_sq += oldest * oldest
+
+        # Remove the last prices and restore the ones they pushed out
+        price_1 = self.prices_1.pop()
+        price_2 = self.prices_2.pop()
+        self.sum_xx -= price_2 * price_2
+        self.sum_xy -= price_2 * price_1
+        if len(self.prices_2) >= self.hedge_window:
+            self.sum_xx += self.prices_2[-self.hedge_window] ** 2
+            self.sum_xy += (
+                self.prices_2[-self.hedge_window] * self.prices_1[-self.hedge_window]
+            )
+
+        self.last_timestamp = self.previous_timestamp
+        self.previous_timestamp = None
+        self.last_pushed_spread = None
+        self._update_spread()
+
+    # Whether the last push can be undone
+    @property
+    def can_pop(self):
+        return self.last_pushed_spread is not None
+
+    # Current z-score of the latest spread
+    @property
+    def z_score(self):
+        n_spreads = min(len(self.spreads), self.zscore_window)
+        if n_spreads < self.zscore_window or n_spreads < 2:
+            return math.nan
+
+        mean = self.sum_spread / n_spreads
+        variance = (self.sum_spread_sq - self.sum_spread * mean) / (n_spreads - 1)
+        if variance <= 0:
+            return math.nan
+
+        return (self.spread - self.spread_shift - mean) / math.sqrt(variance)
+
+    # Rebuild from price history
+    def seed(self, timestamps, prices_1, prices_2):
+        self.__init__(self.hedge_window, self.zscore_window)
+
+        # Last hedge + z-score windows, plus one candle so the last can be popped
+        start = max(0, len(timestamps) - (self.hedge_window + self.zscore_window))
+        for i in range(start, len(timestamps)):
+            self.push(timestamps[i], float(prices_1[i]), float(prices_2[i]))
+
+    # Serialize for saving
+    def to_dict(self):
+        return {
+            "hedge_window": self.hedge_window,
+            "zscore_window": self.zscore_window,
+            "last_timestamp": self.last_timestamp,
+            "previous_timestamp": self.previous_timestamp,
+            "last_pushed_spread": self.last_pushed_spread,
+            "prices_1": list(self.prices_1),
+            "prices_2": list(self.prices_2),
+            "spreads": list(self.spreads),
+            "hedge_ratio": self.hedge_ratio,
+            "spread": self.spread,
+        }
+
+    # Restore from saved dict
+    @classmethod
+    def from_dict(cls, state_dict):
+        state = cls(state_dict["hedge_window"], state_dict["zscore_window"])
+        state.last_timestamp = state_dict["last_timestamp"]
+        state.previous_timestamp = state_dict.get("previous_timestamp")
+        state.last_pushed_spread = state_dict.get("last_pushed_spread")
+        state.prices_1.extend(state_dict["prices_1"])
+        state.prices_2.extend(state_dict["prices_2"])
+        state.spreads.extend(state_dict["spreads"])
+        state.hedge_ratio = state_dict["hedge_ratio"]
+        state.spread = state_dict["spread"]
+        state._resync()
+        return state
+
+
+# Key for a pair in the state file
+def pair_key(base_market, quote_market):
+    return f"{base_market}|{quote_market}"
+
+
+# Load saved pair states
+def load_spread_states():
+    try:
+        with open(SPREAD_STATE_FILE) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    states = {}
+    for key, state_dict in saved.items():
+        states[key] = PairSpreadState.from_dict(state_dict)
+
+    return states
+
+
+# Save pair states
+def save_spread_states(states):
+    saved = {}
+    for key, state in states.items():
+        saved[key] = state.to_dict()
+
+    with open(SPREAD_STATE_FILE, "w") as f:
+        json.dump(saved, f)
+
+
+# Update a pair's state with any candles it has not seen
+def update_spread_state(
+    states, base_market, quote_market, timestamps, prices_1, prices_2
+):
+    """
+    timestamps is a pandas Index matching the two price arrays
+    The last candle seen may still have been forming, so it is popped and
+    pushed again along with any candles after it
+    Falls back to seeding from history when the state is missing or out of sync
+    """
+
+    key = pair_key(base_market, quote_market)
+    state = states.get(key)
+
+    # Guard: Seed new or stale states
+    in_sync = (
+        state is not None
+        and state.hedge_window == HEDGE_RATIO_WINDOW
+        and state.zscore_window == ZSCORE_WINDOW
+        and state.can_pop
+        and state.last_timestamp in timestamps
+    )
+    if not in_sync:
+        state = PairSpreadState()
+        state.seed(timestamps, prices_1, prices_2)
+        states[key] = state
+        return state
+
+    # Replace the provisional last candle, then push new candles
+    start = timestamps.get_loc(state.last_timestamp)
+    state.pop()
+    for i in range(start, len(timestamps)):
+        state.push(timestamps[i], float(prices_1[i]), float(prices_2[i]))
+
+    return state
+
+
+# Check incremental state against a full recompute after a revised tail
+# Usage: python func_spread_state.py
+if __name__ == "__main__":
+    from func_cointegration import calculate_hedge_ratio_and_spread, calculate_zscore
+    import pandas as pd
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    n_rows = HEDGE_RATIO_WINDOW + ZSCORE_WINDOW + 50
+    common = 100 + rng.normal(0, 1, n_rows).cumsum()
+    prices_df = pd.DataFrame(
+        {
+            "A": common * 1.5 + rng.normal(0, 1, n_rows),
+            "B": common + rng.normal(0, 1, n_rows),
+        },
+        index=pd.Index([f"t{i:05d}" for i in range(n_rows)]),
+    )
+
+    # Seed on all but the last 10 candles, then catch up with the last one revised
+    states = {}
+    head_df = prices_df.iloc[:-10]
+    update_spread_state(
+        states, "A", "B", head_df.index, head_df["A"].values, head_df["B"].values
+    )
+    prices_df.iloc[-11, 0] += 5
+    state = update_spread_state(
+        states, "A", "B", prices_df.index, prices_df["A"].values, prices_df["B"].values
+    )
+
+    # Revise the newest candle again, as the next tick would
+    prices_df.iloc[-1, 1] -= 3
+    state = update_spread_state(
+        states, "A", "B", prices_df.index, prices_df["A"].values, prices_df["B"].values
+    )
+
+    spread_df = calculate_hedge_ratio_and_spread(
+        prices_df, "A", "B", window=HEDGE_RATIO_WINDOW
+    )
+    expected = calculate_zscore(spread_df["spread"].values, ZSCORE_WINDOW).values[-1]
+    print(f"Incremental z-score {state.z_score:.6f}, full recompute {expected:.6f}")
+    assert abs(state.z_score - expected) < 1e-8
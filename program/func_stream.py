@@ -0,0 +1,267 @@
+from constants import RESOLUTION, STREAM_HOST
+from func_utils import RESOLUTION_SECONDS, to_epoch_seconds, format_candle_time
+import pandas as pd
+import numpy as np
+import threading
+import asyncio
+import json
+import time
+
+# Stream used by the live price path, set by start_price_stream
+ACTIVE_STREAM = None
+
+
+# Class: Live candles built from the exchange trade stream
+class PriceStream:
+    """
+    Subscribes to v3_trades for each market over websocket
+    Buckets trades into candles of RESOLUTION and keeps a rolling window in memory
+    Runs its own asyncio loop on a background thread and reconnects on errors
+    """
+
+    # Initialize class
+    def __init__(
+        self,
+        markets,
+        url=STREAM_HOST,
+        resolution=RESOLUTION,
+        max_candles=500,
+        record_path=None,
+    ):
+        self.url = url
+        self.candle_seconds = RESOLUTION_SECONDS[resolution]
+        self.max_candles = max_candles
+        self.record_path = record_path
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Per market: candle start epoch -> (trade createdAt, price)
+        self.candles = {}
+        self.markets = set()
+        self.pending_markets = set()
+        self.update_markets(markets)
+
+        # Time the current connection started receiving, None when disconnected
+        self.covered_since = None
+
+        # Per market: time its subscription was sent on the current connection
+        self.subscribed_since = {}
+
+    # Subscribe to any new markets
+    def update_markets(self, markets):
+        with self.lock:
+            for market in markets:
+                if market not in self.markets:
+                    self.markets.add(market)
+                    self.pending_markets.add(market)
+                    self.candles[market] = {}
+
+    # Start background thread
+    def start(self):
+        self.thread = threading.Thread(target=asyncio.run, args=(self._run(),))
+        self.thread.daemon = True
+        self.thread.start()
+
+    # Stop background thread
+    def stop(self, timeout=5):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    # Connect, subscribe and consume until stopped
+    async def _run(self):
+        # Only needed when streaming, keep it off the cron import path
+        import websockets
+
+        backoff = 1
+        while not self.stop_event.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=20) as ws:
+                    # Resubscribe everything on each connection
+                    with self.lock:
+                        self.pending_markets = set(self.markets)
+                    self.covered_since = time.time()
+                    backoff = 1
+
+                    while not self.stop_event.is_set():
+                        await self._subscribe_pending(ws)
+
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1)
+                        except asyncio.TimeoutError:
+                            continue
+
+                        self._record(raw)
+                        self.handle_message(json.loads(raw))
+
+            except Exception as e:
+                print(f"Price stream error: {e}")
+
+            # Trades may have been missed while disconnected
+            self.covered_since = None
+            with self.lock:
+                self.subscribed_since = {}
+            if not self.stop_event.is_set():
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    # Send subscribe messages for new markets
+    async def _subscribe_pending(self, ws):
+        with self.lock:
+            pending = sorted(self.pending_markets)
+            self.pending_markets = set()
+
+        for market in pending:
+            await ws.send(
+                json.dumps({"type": "subscribe", "channel": "v3_trades", "id": market})
+            )
+            with self.lock:
+                self.subscribed_since[market] = time.time()
+
+    # Save raw message for replay
+    def _record(self, raw):
+        if self.record_path is None:
+            return
+        with open(self.record_path, "a") as f:
+            f.write(json.dumps({"received_at": time.time(), "message": raw}) + "\n")
+
+    # Apply a websocket message
+    def handle_message(self, message):
+        if message.get("channel") != "v3_trades":
+            return
+        if message.get("type") not in ("subscribed", "channel_data"):
+            return
+
+        market = message["id"]
+        with self.lock:
+            if market not in self.candles:
+                return
+            candles = self.candles[market]
+
+            for trade in message["contents"]["trades"]:
+                created_at = trade["createdAt"]
+                epoch = to_epoch_seconds(created_at)
+                started_at = epoch - epoch % self.candle_seconds
+
+                # Keep the latest trade in each candle as its close
+                current = candles.get(started_at)
+                if current is None or created_at >= current[0]:
+                    candles[started_at] = (created_at, float(trade["price"]))
+
+            # Trim old candles
+            if len(candles) > self.max_candles:
+                for started_at in sorted(candles.keys())[: -self.max_candles]:
+                    del candles[started_at]
+
+    # Closes per candle start for a market, forward filled over quiet candles
+    def _closes(self, market, from_epoch, to_epoch):
+        candles = self.candles.get(market, {})
+        closes = []
+        last_close = np.nan
+        for started_at in sorted(candles.keys()):
+            if started_at < from_epoch:
+                last_close = candles[started_at][1]
+
+        for started_at in range(from_epoch, to_epoch + 1, self.candle_seconds):
+            if started_at in candles:
+                last_close = candles[started_at][1]
+            closes.append(last_close)
+
+        return closes
+
+    # Check stream has any prices for a market
+    def has_market(self, market):
+        with self.lock:
+            return len(self.candles.get(market, {})) > 0
+
+    # Recent close prices, same output as func_public.get_candles_recent
+    def get_candles_recent(self, market, limit=100):
+        now = time.time()
+        current = int(now - now % self.candle_seconds)
+        first = current - (limit - 1) * self.candle_seconds
+
+        with self.lock:
+            closes = self._closes(market, first, current)
+
+        # Drop candles before the first trade seen
+        prices_result = np.array(closes, dtype=float)
+        return prices_result[~np.isnan(prices_result)]
+
+    # Completed candles from a timestamp on as a price matrix
+    def get_closed_candles(self, markets, since):
+        """
+        Returns a DataFrame indexed like market_prices for closed candles from
+        `since` on, so a provisional close stored for `since` can be replaced
+        Returns None if the stream was not connected for the whole span
+        Only markets subscribed since before the gap began get a column
+        Quiet markets are left NaN for the caller to forward fill
+        """
+
+        since_epoch = to_epoch_seconds(since)
+        first = since_epoch + self.candle_seconds
+        now = time.time()
+        last = int(now - now % self.candle_seconds) - self.candle_seconds
+
+        # Guard: Stream must have been connected before the gap began
+        if self.covered_since is None or self.covered_since > first:
+            return None
+
+        with self.lock:
+            covered = [
+                market
+                for market in markets
+                if self.subscribed_since.get(market, first + 1) <= first
+            ]
+
+            data = {}
+            for market in covered:
+                candles = self.candles.get(market, {})
+                data[market] = [
+                    candles[t][1] if t in candles else np.nan
+                    for t in range(since_epoch, last + 1, self.candle_seconds)
+                ]
+
+        index = [
+            format_candle_time(t)
+            for t in range(since_epoch, last + 1, self.candle_seconds)
+        ]
+        return pd.DataFrame(
+            data, index=pd.Index(index, name="datetime"), columns=covered, dtype=float
+        )
+
+
+# Markets for listed pairs and open trades
+def get_listed_markets():
+    markets = set()
+
+    try:
+        coint_pairs_df = pd.read_csv("cointegrated_pairs.csv")
+        markets.update(coint_pairs_df["base_market"].tolist())
+        markets.update(coint_pairs_df["quote_market"].tolist())
+    except (OSError, KeyError, pd.errors.EmptyDataError):
+        pass
+
+    try:
+        with open("bot_agents.json") as f:
+            for agent in json.load(f):
+                markets.add(agent["market_1"])
+                markets.add(agent["market_2"])
+    except (OSError, ValueError):
+        pass
+
+    return sorted(markets)
+
+
+# Start the shared price stream
+def start_price_stream(markets, **kwargs):
+    global ACTIVE_STREAM
+    ACTIVE_STREAM = PriceStream(markets, **kwargs)
+    ACTIVE_STREAM.start()
+    return ACTIVE_STREAM
+
+
+# Subscribe the running stream to new markets
+def update_stream_markets(markets):
+    if ACTIVE_STREAM is not None:
+        ACTIVE_STREAM.update_markets(markets)
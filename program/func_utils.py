@@ -1,4 +1,16 @@
 from datetime import datetime, timedelta
+import calendar
+
+# Candle length in seconds per resolution
+RESOLUTION_SECONDS = {
+    "1MIN": 60,
+    "5MINS": 300,
+    "15MINS": 900,
+    "30MINS": 1800,
+    "1HOUR": 3600,
+    "4HOURS": 14400,
+    "1DAY": 86400,
+}
 
 
 # Format number
@@ -37,17 +49,44 @@ def format_time(timestamp):
     return timestamp.replace(microsecond=0).isoformat()
 
 
+# Parse time
+def parse_time(timestamp):
+    return datetime.strptime(timestamp[:19], "%Y-%m-%dT%H:%M:%S")
+
+
+# Convert exchange timestamp to epoch seconds
+def to_epoch_seconds(timestamp):
+    return calendar.timegm(parse_time(timestamp).timetuple())
+
+
+# Format epoch seconds as a candle startedAt timestamp
+def format_candle_time(epoch_seconds):
+    return datetime.utcfromtimestamp(epoch_seconds).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
 # Get ISO Times
-def get_ISO_times():
-    # Get timestamps
+def get_ISO_times(since=None):
+    """
+    Split the last 1000 hours into 100 hour ranges, newest first
+    If since is given, ranges stop at that datetime instead
+    """
+
     # Get timestamps
     date_starts = []
 
     for i in range(11):
         if i == 0:
             date_starts.append(datetime.utcnow())
-        else:
-            date_starts.append(date_starts[i - 1] - timedelta(hours=100))
+            continue
+
+        date_start = date_starts[i - 1] - timedelta(hours=100)
+
+        # Stop once the requested start is covered
+        if since is not None and date_start <= since:
+            date_starts.append(since)
+            break
+
+        date_starts.append(date_start)
 
     # Format datetimes
     times_dict = {}
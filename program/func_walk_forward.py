@@ -0,0 +1,246 @@
+from constants import (
+    ZSCORE_THRESH,
+    ZSCORE_WINDOW,
+    HEDGE_RATIO_WINDOW,
+    MAX_HALF_LIFE,
+    BACKTEST_FEE_RATE,
+    BACKTEST_SLIPPAGE_RATE,
+)
+from func_cointegration import select_cointegrated_pairs
+from func_backtest import calculate_pair_zscores, backtest_pairs
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+import itertools
+import tempfile
+import json
+import sys
+import os
+
+# Output of the command line sweep
+WALK_FORWARD_RESULTS_FILE = "walk_forward_results.csv"
+
+# Default parameter grid, live settings included
+WALK_FORWARD_GRID = {
+    "zscore_thresh": sorted({1.0, 1.5, 2.0, 2.5, ZSCORE_THRESH}),
+    "zscore_window": sorted({24, 48, 72, ZSCORE_WINDOW}),
+    "hedge_window": sorted({72, 168, 336, HEDGE_RATIO_WINDOW}),
+    "max_half_life": sorted({12, 24, 48, MAX_HALF_LIFE}),
+}
+
+# Price matrix memory-mapped by each sweep worker
+_worker_prices = None
+
+
+# Attach worker to the shared price matrix
+def _init_sweep_worker(prices_path):
+    global _worker_prices
+    _worker_prices = np.load(prices_path, mmap_mode="r")
+
+
+# Train and test rows for each fold
+def make_folds(n_rows, train_bars, test_bars):
+    folds = []
+    for train_start in range(0, n_rows - train_bars - test_bars + 1, test_bars):
+        test_start = train_start + train_bars
+        folds.append((train_start, test_start, test_start + test_bars))
+
+    return folds
+
+
+# Select pairs on one training window inside a worker
+def _select_fold_pairs(markets, fold, max_half_life):
+    train_start, test_start, test_end = fold
+    prices = np.asarray(_worker_prices[train_start:test_start], dtype=float)
+
+    return select_cointegrated_pairs(prices, markets, max_half_life, workers=1)
+
+
+# Evaluate every threshold and half life cutoff for one set of windows
+def _evaluate_fold_windows(fold, pairs, hedge_window, zscore_window, grid, costs):
+    """
+    Rolling hedge ratio and ZScore are computed once for the windows
+    and reused for every ZScore threshold and half life cutoff
+    """
+
+    train_start, test_start, test_end = fold
+    rows = []
+
+    # Include enough history before the test window to warm up the windows
+    warmup_start = max(0, test_start - (hedge_window + zscore_window - 1))
+    prices = np.asarray(_worker_prices[warmup_start:test_end], dtype=float)
+    base_columns = [pair["base_column"] for pair in pairs]
+    quote_columns = [pair["quote_column"] for pair in pairs]
+    half_lives = np.array([pair["half_life"] for pair in pairs], dtype=float)
+
+    # Guard: Nothing to trade without pairs
+    result = {"net_pnl": np.zeros(0), "turnover": np.zeros(0), "trades": np.zeros(0)}
+    if len(pairs) > 0:
+        series_1, series_2, z_scores = calculate_pair_zscores(
+            prices, base_columns, quote_columns, hedge_window, zscore_window
+        )
+
+        # No trades may open before the test window
+        z_scores[: test_start - warmup_start] = np.nan
+
+    for zscore_thresh in grid["zscore_thresh"]:
+        if len(pairs) > 0:
+            result = backtest_pairs(
+                prices,
+                base_columns,
+                quote_columns,
+                zscore_thresh=zscore_thresh,
+                z_scores=z_scores,
+                **costs,
+            )
+
+        for max_half_life in grid["max_half_life"]:
+            selected = half_lives <= max_half_life
+            rows.append(
+                {
+                    "train_start": train_start,
+                    "test_start": test_start,
+                    "test_end": test_end,
+                    "hedge_window": hedge_window,
+                    "zscore_window": zscore_window,
+                    "zscore_thresh": zscore_thresh,
+                    "max_half_life": max_half_life,
+                    "pairs": int(selected.sum()),
+                    "net_pnl": float(result["net_pnl"][selected].sum()),
+                    "turnover": float(result["turnover"][selected].sum()),
+                    "trades": int(result["trades"][selected].sum()),
+                }
+            )
+
+    return rows
+
+
+# Pick parameters on past folds and apply them to the next
+def summarize_walk_forward(results_df):
+    """
+    For each fold after the first, the grid point with the best total net PnL
+    over all earlier folds is traded, giving an out-of-sample PnL series
+    """
+
+    params = ["hedge_window", "zscore_window", "zscore_thresh", "max_half_life"]
+    test_starts = sorted(results_df["test_start"].unique())
+
+    chosen = []
+    for i, test_start in enumerate(test_starts[1:], start=1):
+        past_df = results_df[results_df["test_start"].isin(test_starts[:i])]
+        best = past_df.groupby(params)["net_pnl"].sum().idxmax()
+
+        fold_df = results_df[results_df["test_start"] == test_start]
+        chosen.append(fold_df.set_index(params).loc[[best]].reset_index())
+
+    # Guard: Need at least two folds
+    if len(chosen) == 0:
+        return pd.DataFrame(columns=results_df.columns)
+
+    return pd.concat(chosen, ignore_index=True)
+
+
+# Walk-forward parameter sweep
+def walk_forward_sweep(
+    prices,
+    markets,
+    train_bars,
+    test_bars,
+    grid=WALK_FORWARD_GRID,
+    workers=None,
+    fee_rate=BACKTEST_FEE_RATE,
+    slippage_rate=BACKTEST_SLIPPAGE_RATE,
+):
+    """
+    Re-selects cointegrated pairs on each training window with the loosest
+    half life cutoff, then backtests every grid point on the following window
+    Folds and window pairs are spread over a process pool sharing one
+    memory-mapped copy of the price matrix
+    Returns one row per fold and grid point with out-of-sample results
+    """
+
+    workers = workers or os.cpu_count()
+    folds = make_folds(len(prices), train_bars, test_bars)
+    costs = {"fee_rate": fee_rate, "slippage_rate": slippage_rate}
+    positions = {market: i for i, market in enumerate(markets)}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Column-major so each market is contiguous on disk
+        prices_path = os.path.join(tmp_dir, "prices.npy")
+        np.save(prices_path, np.asfortranarray(np.asarray(prices, dtype=float)))
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_sweep_worker,
+            initargs=(prices_path,),
+        ) as executor:
+            # Select pairs for every fold
+            fold_pairs = list(
+                executor.map(
+                    _select_fold_pairs,
+                    [markets] * len(folds),
+                    folds,
+                    [max(grid["max_half_life"])] * len(folds),
+                )
+            )
+
+            # One task per fold and window pair
+            futures = []
+            for fold, pairs in zip(folds, fold_pairs):
+                for pair in pairs:
+                    pair["base_column"] = positions[pair["base_market"]]
+                    pair["quote_column"] = positions[pair["quote_market"]]
+
+                for hedge_window, zscore_window in itertools.product(
+                    grid["hedge_window"], grid["zscore_window"]
+                ):
+                    futures.append(
+                        executor.submit(
+                            _evaluate_fold_windows,
+                            fold,
+                            pairs,
+                            hedge_window,
+                            zscore_window,
+                            grid,
+                            costs,
+                        )
+                    )
+
+            for future in futures:
+                results.extend(future.result())
+
+    return pd.DataFrame(results)
+
+
+# Sweep the saved price matrix and write results
+# Usage: python func_walk_forward.py [train_bars] [test_bars] [workers]
+if __name__ == "__main__":
+    from func_price_cache import load_market_prices
+
+    train_bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    test_bars = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    df_market_prices = load_market_prices()
+    results_df = walk_forward_sweep(
+        df_market_prices.values,
+        df_market_prices.columns.tolist(),
+        train_bars,
+        test_bars,
+        workers=workers,
+    )
+    results_df.to_csv(WALK_FORWARD_RESULTS_FILE, index=False)
+
+    # Print walk-forward out-of-sample result
+    summary_df = summarize_walk_forward(results_df)
+    print(summary_df.to_string(index=False))
+    print(
+        json.dumps(
+            {
+                "folds": int(results_df["test_start"].nunique()),
+                "grid_points": int(len(results_df)),
+                "walk_forward_net_pnl": float(summary_df["net_pnl"].sum()),
+            }
+        )
+    )
@@ -1,16 +1,115 @@
-from constants import ABORT_ALL_POSITIONS, FIND_COINTEGRATED, PLACE_TRADES, MANAGE_EXITS
+from constants import (
+    ABORT_ALL_POSITIONS,
+    FIND_COINTEGRATED,
+    PLACE_TRADES,
+    MANAGE_EXITS,
+    DAEMON_MODE,
+    STREAM_PRICES,
+    PROFILE_TICK,
+)
 from func_connections import connect_dydx
-from func_private import abort_all_positions
-from func_public import construct_market_prices
-from func_cointegration import store_cointegration_results
-from func_entry_pairs import open_positions
-from func_exit_pairs import manage_trade_exits
 from func_messaging import send_message
-import time
+from func_metrics import API_METRICS, STAGE_METRICS, PROFILE_NEXT_TICK, measure_run
+import sys
+
+# Stage modules are imported inside the functions that use them
+# so each mode only pays for the libraries it needs at startup
+
+
+# Find cointegrated pairs
+@measure_run("refresh")
+def find_cointegrated_pairs(client):
+    from func_public import construct_market_prices
+    from func_cointegration import store_cointegration_results
+
+    # Construct Market Prices
+    try:
+        print("Fetching market prices...")
+        with STAGE_METRICS.stage("construct_market_prices"):
+            df_market_prices = construct_market_prices(client)
+
+    except Exception as e:
+        print("Error constructing market prices: ", e)
+        send_message(f"Error constructing market prices {e}")
+        return False
+
+    # Store Cointegrated Pairs
+    try:
+        print("Storing cointegrated pairs...")
+        with STAGE_METRICS.stage("store_cointegration_results"):
+            stores_result = store_cointegration_results(df_market_prices)
+
+        if stores_result != "saved":
+            print("Error saving cointegrated pairs")
+            return False
+
+    except Exception as e:
+        print("Error saving cointegrated pairs: ", e)
+        send_message(f"Error saving cointegrated pairs {e}")
+        return False
+
+    return True
+
+
+# Manage exits and place trades
+@measure_run("tick")
+def run_trading_cycle(client):
+    # Manage exits for open positions
+    if MANAGE_EXITS:
+        from func_exit_pairs import manage_trade_exits
+
+        try:
+            print("Managing exits...")
+            with STAGE_METRICS.stage("manage_trade_exits"):
+                manage_trade_exits(client)
+
+        except Exception as e:
+            print("Error managing exiting positions: ", e)
+            send_message(f"Error managing exiting positions {e}")
+            return False
+
+    # Place trades for opening positions
+    if PLACE_TRADES:
+        from func_entry_pairs import open_positions
+
+        try:
+            print("Finding trading opportunities...")
+            with STAGE_METRICS.stage("open_positions"):
+                open_positions(client)
+
+        except Exception as e:
+            print("Error trading pairs: ", e)
+            send_message(f"Error opening trades {e}")
+            return False
+
+    return True
+
+
+# Print API latency since the last report
+def log_api_metrics():
+    summary = API_METRICS.summary()
+    if summary:
+        print("API requests:")
+        print(summary)
+    API_METRICS.reset()
+
+
+# Run one trading cycle and report API usage
+def run_tick(client):
+    is_ok = run_trading_cycle(client)
+    log_api_metrics()
+    return is_ok
 
 
 # MAIN FUNCTION
 if __name__ == "__main__":
+    # Run as a long-lived process instead of once per cron tick
+    is_daemon = DAEMON_MODE or "--daemon" in sys.argv[1:]
+
+    # Capture the first tick with cProfile
+    if PROFILE_TICK or "--profile" in sys.argv[1:]:
+        PROFILE_NEXT_TICK.set()
+
     # Connect to client
     try:
         print("Connecting to Client...")
@@ -23,6 +122,8 @@ if __name__ == "__main__":
 
     # Abort all open positions
     if ABORT_ALL_POSITIONS:
+        from func_private import abort_all_positions
+
         try:
             print("Closing all positions...")
             close_orders = abort_all_positions(client)
@@ -32,50 +133,36 @@ if __name__ == "__main__":
             send_message(f"Error closing all positions {e}")
             exit(1)
 
-    # Find Cointegrated Pairs
-    if FIND_COINTEGRATED:
-        # Construct Market Prices
-        try:
-            print("Fetching market prices, please allow 3 mins...")
-            df_market_prices = construct_market_prices(client)
+    # Keep running on a candle-aligned timer
+    if is_daemon:
+        from func_daemon import run_daemon
 
-        except Exception as e:
-            print("Error constructing market prices: ", e)
-            send_message(f"Error constructing market prices {e}")
-            exit(1)
+        run_refresh = find_cointegrated_pairs if FIND_COINTEGRATED else None
 
-        # Store Cointegrated Pairs
-        try:
-            print("Storing cointegrated pairs...")
-            stores_result = store_cointegration_results(df_market_prices)
+        # Stream live candles for listed pairs
+        if STREAM_PRICES:
+            from func_stream import (
+                start_price_stream,
+                update_stream_markets,
+                get_listed_markets,
+            )
 
-            if stores_result != "saved":
-                print("Error saving cointegrated pairs")
-                exit(1)
+            start_price_stream(get_listed_markets())
 
-        except Exception as e:
-            print("Error saving cointegrated pairs: ", e)
-            send_message(f"Error saving cointegrated pairs {e}")
-            exit(1)
+            # Follow newly listed pairs after each refresh
+            def run_refresh(client, refresh=run_refresh):
+                is_ok = refresh(client) if refresh is not None else True
+                update_stream_markets(get_listed_markets())
+                return is_ok
 
-    # Place trades for opening positions
-    if MANAGE_EXITS:
-        try:
-            print("Managing exits...")
-            manage_trade_exits(client)
+        run_daemon(client, run_tick, run_refresh)
+        exit(0)
 
-        except Exception as e:
-            print("Error managing exiting positions: ", e)
-            send_message(f"Error managing exiting positions {e}")
+    # Find Cointegrated Pairs
+    if FIND_COINTEGRATED:
+        if not find_cointegrated_pairs(client):
             exit(1)
 
-    # Place trades for opening positions
-    if PLACE_TRADES:
-        try:
-            print("Finding trading opportunities...")
-            open_positions(client)
-
-        except Exception as e:
-            print("Error trading pairs: ", e)
-            send_message(f"Error opening trades {e}")
-            exit(1)
+    # Manage exits and place trades
+    if not run_tick(client):
+        exit(1)
@@ -0,0 +1,126 @@
+"""
+Local websocket server replaying a recorded price stream for testing
+Record with PriceStream(..., record_path="stream.jsonl"), then run:
+    python stream_replay_server.py stream.jsonl --port 8765 --speed 10
+and point the bot at it with STREAM_HOST=ws://localhost:8765
+"""
+
+from datetime import datetime, timedelta
+import websockets
+import argparse
+import asyncio
+import json
+import time
+
+TRADE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+# Load recorded messages in receive order
+def load_recording(path):
+    recording = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            recording.append((entry["received_at"], entry["message"]))
+
+    recording.sort(key=lambda entry: entry[0])
+    return recording
+
+
+# Shift trade times so replayed trades look live
+def shift_trade_times(message, offset_seconds):
+    for trade in message.get("contents", {}).get("trades", []):
+        created_at = datetime.strptime(trade["createdAt"], TRADE_TIME_FORMAT)
+        created_at += timedelta(seconds=offset_seconds)
+        trade["createdAt"] = created_at.strftime(TRADE_TIME_FORMAT)[:-4] + "Z"
+    return message
+
+
+# Build connection handler
+def make_handler(recording, speed, live_times, subscribe_wait=1):
+    async def handle_connection(websocket, path=None):
+        subscribed = set()
+        first_subscribe = asyncio.Event()
+
+        # Track subscriptions sent by the client
+        async def read_subscriptions():
+            async for raw in websocket:
+                request = json.loads(raw)
+                if request.get("type") == "subscribe":
+                    subscribed.add(request.get("id"))
+                    first_subscribe.set()
+
+        reader = asyncio.ensure_future(read_subscriptions())
+        await websocket.send(
+            json.dumps({"type": "connected", "connection_id": "replay", "message_id": 0})
+        )
+
+        # Give the client a moment to subscribe before replaying
+        try:
+            await asyncio.wait_for(first_subscribe.wait(), timeout=subscribe_wait)
+            await asyncio.sleep(0.1)
+        except asyncio.TimeoutError:
+            pass
+
+        try:
+            started_at = time.time()
+            first_received_at = recording[0][0] if recording else started_at
+            for received_at, raw in recording:
+                # Keep recorded spacing, scaled by speed
+                delay = (received_at - first_received_at) / speed
+                await asyncio.sleep(max(0, started_at + delay - time.time()))
+
+                message = json.loads(raw)
+                if message.get("id") not in subscribed:
+                    continue
+
+                if live_times:
+                    offset_seconds = started_at + delay - received_at
+                    message = shift_trade_times(message, offset_seconds)
+
+                await websocket.send(json.dumps(message))
+
+            # Stay connected like an idle feed until the client leaves
+            await reader
+
+        except websockets.ConnectionClosed:
+            pass
+
+        finally:
+            reader.cancel()
+
+    return handle_connection
+
+
+# Serve until interrupted
+async def serve(path, host, port, speed, live_times):
+    recording = load_recording(path)
+    handler = make_handler(recording, speed, live_times)
+
+    async with websockets.serve(handler, host, port):
+        print(f"Replaying {len(recording)} messages on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+# MAIN FUNCTION
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded price stream")
+    parser.add_argument("path", help="JSON lines file recorded by PriceStream")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument(
+        "--recorded-times",
+        action="store_true",
+        help="Keep original trade times instead of shifting them to now",
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(
+            serve(args.path, args.host, args.port, args.speed, not args.recorded_times)
+        )
+    except KeyboardInterrupt:
+        pass